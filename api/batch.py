@@ -0,0 +1,115 @@
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connections
+from django.urls import Resolver404, resolve
+from rest_framework import status
+
+API_PREFIX = "/api/"
+BATCH_URL_NAME = "batch"
+MAX_REQUESTS = 20
+MAX_WORKERS = 4
+
+logger = logging.getLogger(__name__)
+
+
+def _make_request(request, method, path, body):
+    """
+    Builds a sub-request inheriting headers of the batch request, the user
+    authenticated for the batch is forced so tokens are decoded only once.
+    """
+    path, _, query = path.partition("?")
+    content = b"" if body is None else json.dumps(body).encode()
+
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if not key.startswith(("wsgi.", "CONTENT_"))
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": API_PREFIX + path,
+            "QUERY_STRING": query,
+            "HTTP_ACCEPT": "application/json",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(content)),
+            "wsgi.input": io.BytesIO(content),
+            "wsgi.url_scheme": request.scheme,
+        }
+    )
+    sub_request = WSGIRequest(environ)
+    if request.user.is_authenticated:
+        sub_request.user = request.user
+        sub_request._force_auth_user = request.user
+    return sub_request
+
+
+def _error(status_code, detail):
+    return {"status": status_code, "body": {"detail": detail}}
+
+
+def run_one(request, item):
+    path = item["path"]
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX) :]
+    path = path.lstrip("/")
+
+    try:
+        match = resolve("/" + path.partition("?")[0], urlconf="api.urls")
+    except Resolver404:
+        return _error(status.HTTP_404_NOT_FOUND, "Not found.")
+    if match.url_name == BATCH_URL_NAME:
+        return _error(status.HTTP_400_BAD_REQUEST, "Batches can't be nested.")
+
+    sub_request = _make_request(request, item["method"], path, item.get("body"))
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item["method"], path)
+        return _error(status.HTTP_500_INTERNAL_SERVER_ERROR, "Server error.")
+
+    if hasattr(response, "data"):
+        body = response.data
+    else:
+        response.render()
+        body = json.loads(response.content) if response.content else None
+    return {"status": response.status_code, "body": body}
+
+
+def _run_in_thread(request, item):
+    try:
+        return run_one(request, item)
+    finally:
+        connections.close_all()
+
+
+def run_batch(request, items, parallel=False):
+    """
+    Runs sub-requests in order. With `parallel` consecutive GET requests run
+    concurrently, any other method waits for the previous ones to finish.
+    """
+    if not parallel:
+        return [run_one(request, item) for item in items]
+
+    results = []
+    reads = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for item in items + [None]:
+            if item is not None and item["method"] == "GET":
+                reads.append(item)
+                continue
+            if len(reads) > 1:
+                results.extend(
+                    executor.map(lambda read: _run_in_thread(request, read), reads)
+                )
+            elif reads:
+                results.append(run_one(request, reads[0]))
+            reads = []
+            if item is not None:
+                results.append(run_one(request, item))
+    return results
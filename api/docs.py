@@ -0,0 +1,57 @@
+"""
+Schema annotations for api views that don't import drf_yasg.
+
+drf_yasg is only needed to generate the schema, so the overrides are stored
+on view methods and handed to drf_yasg's swagger_auto_schema by
+apply_schema_overrides() right before generation.
+"""
+from collections import namedtuple
+
+QueryParameter = namedtuple("QueryParameter", ("name", "description"))
+
+
+class no_body:
+    """Stands for drf_yasg.utils.no_body"""
+
+
+def swagger_auto_schema(**overrides):
+    def decorator(view_method):
+        view_method._deferred_swagger_auto_schema = overrides
+        return view_method
+
+    return decorator
+
+
+def _resolve(value):
+    from drf_yasg import openapi
+    from drf_yasg.utils import no_body as yasg_no_body
+
+    if value is no_body:
+        return yasg_no_body
+    if isinstance(value, QueryParameter):
+        return openapi.Parameter(
+            value.name,
+            openapi.IN_QUERY,
+            description=value.description,
+            type=openapi.TYPE_STRING,
+        )
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value
+
+
+def apply_schema_overrides(view_classes):
+    from drf_yasg.utils import swagger_auto_schema as yasg_swagger_auto_schema
+
+    for view_class in view_classes:
+        if not isinstance(view_class, type):
+            continue
+        for klass in view_class.__mro__:
+            for view_method in vars(klass).values():
+                overrides = getattr(view_method, "_deferred_swagger_auto_schema", None)
+                # already applied or not annotated
+                if overrides is None or hasattr(view_method, "_swagger_auto_schema"):
+                    continue
+                yasg_swagger_auto_schema(
+                    **{key: _resolve(value) for key, value in overrides.items()}
+                )(view_method)
@@ -0,0 +1,27 @@
+import math
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "Object was changed since the given version."
+    default_code = "precondition_failed"
+
+
+class FullResyncRequired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token has expired, sync again without it."
+    default_code = "full_resync_required"
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Service is overloaded, try again later."
+    default_code = "overloaded"
+
+    def __init__(self, wait):
+        super().__init__()
+        # sent as Retry-After by the exception handler
+        self.wait = math.ceil(wait)
@@ -0,0 +1,110 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import FastJSONRenderer
+from api.values_serializer import (
+    AimValuesSerializer,
+    DreamValuesSerializer,
+    PostValuesSerializer,
+)
+from goals.models import Aim, Dream, Post
+from user.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares ModelSerializer and values() serialization of aim, dream "
+        "and post lists. Rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows, repeat = options["rows"], options["repeat"]
+        context = {"request": Request(APIRequestFactory().get("/api/"))}
+
+        with transaction.atomic():
+            user = User.objects.create(
+                email="bench@serializers.local",
+                first_name="Bench",
+                last_name="Mark",
+                password="bench",
+            )
+            now = timezone.now()
+            Aim.objects.bulk_create(
+                Aim(user=user, name=f"aim {i}", description="д" * 50, deadline=now)
+                for i in range(rows)
+            )
+            Dream.objects.bulk_create(
+                Dream(user=user, name=f"dream {i}", description="д" * 50)
+                for i in range(rows)
+            )
+            Post.objects.bulk_create(
+                Post(
+                    creator=user,
+                    name=f"post {i}",
+                    video=f"uploads/videos/{i}.mp4",
+                    description="д" * 50,
+                )
+                for i in range(rows)
+            )
+
+            cases = [
+                ("aims", Aim.objects.filter(user=user), AimValuesSerializer),
+                ("dreams", Dream.objects.filter(user=user), DreamValuesSerializer),
+                ("posts", Post.objects.filter(creator=user), PostValuesSerializer),
+            ]
+            for name, queryset, values_serializer_class in cases:
+                model_path = self.model_path(queryset, values_serializer_class, context)
+                values_path = self.values_path(
+                    queryset, values_serializer_class, context
+                )
+                if model_path() != values_path():
+                    raise CommandError(f"{name}: values() output differs")
+
+                model_time = self.measure(model_path, repeat)
+                values_time = self.measure(values_path, repeat)
+                self.stdout.write(
+                    f"{name}: {rows} rows, serializer {model_time * 1000:.1f} ms, "
+                    f"values {values_time * 1000:.1f} ms, "
+                    f"speedup x{model_time / values_time:.1f}"
+                )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def model_path(queryset, values_serializer_class, context):
+        serializer_class = values_serializer_class.serializer_class
+
+        def render():
+            data = serializer_class(queryset.all(), many=True, context=context).data
+            return JSONRenderer().render(data)
+
+        return render
+
+    @staticmethod
+    def values_path(queryset, values_serializer_class, context):
+        def render():
+            serializer = values_serializer_class(context=context)
+            data = serializer.serialize(serializer.get_values(queryset.all()))
+            return FastJSONRenderer().render(data)
+
+        return render
+
+    @staticmethod
+    def measure(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.schema import generate_documents
+
+
+class Command(BaseCommand):
+    help = "Generates the OpenAPI schema served on /swagger.json and /swagger.yaml."
+
+    def handle(self, *args, **options):
+        documents = generate_documents()
+        self.stdout.write(
+            f"Schema {documents.fingerprint[:12]} written, "
+            f"{len(documents.json)} bytes json, {len(documents.yaml)} bytes yaml"
+        )
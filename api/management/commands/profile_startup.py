@@ -0,0 +1,104 @@
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# boots a fresh worker, serves one request and prints the time it took
+WORKER_SCRIPT = """
+import io, os, sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+booted = time.perf_counter()
+status = []
+environ = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": sys.argv[1],
+    "QUERY_STRING": "",
+    "SERVER_NAME": "localhost",
+    "SERVER_PORT": "80",
+    "SERVER_PROTOCOL": "HTTP/1.1",
+    "wsgi.input": io.BytesIO(),
+    "wsgi.errors": sys.stderr,
+    "wsgi.url_scheme": "http",
+}
+response = application(environ, lambda s, headers, exc_info=None: status.append(s))
+b"".join(response)
+served = time.perf_counter()
+print(status[0].split()[0], booted - start, served - start)
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures worker cold start in default and lean (LEAN_STARTUP=1) mode: "
+        "time to first request and import time per module."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/api/posts/")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15)
+
+    def run_worker(self, lean, importtime=False):
+        env = dict(os.environ, LEAN_STARTUP="1" if lean else "0")
+        env.setdefault("DJANGO_SETTINGS_MODULE", "vdohnovitely_hack_backend.settings")
+        args = [sys.executable]
+        if importtime:
+            args += ["-X", "importtime"]
+        args += ["-c", WORKER_SCRIPT, self.path]
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            args, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        wall = time.perf_counter() - start
+        if result.returncode:
+            raise CommandError(result.stderr)
+        status, booted, served = result.stdout.split()[-3:]
+        return status, float(booted), float(served), wall, result.stderr
+
+    @staticmethod
+    def parse_importtime(output):
+        """Returns (module, cumulative microseconds) and self time per package"""
+        modules, packages = [], defaultdict(int)
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            own, cumulative, name = line[len("import time:") :].split("|")
+            name = name.strip()
+            modules.append((name, int(cumulative)))
+            packages[name.split(".")[0]] += int(own)
+        return modules, packages
+
+    def handle(self, *args, **options):
+        self.path = options["path"]
+        for lean in (False, True):
+            runs = [self.run_worker(lean) for _ in range(options["repeat"])]
+            status = runs[0][0]
+            booted = min(run[1] for run in runs)
+            served = min(run[2] for run in runs)
+            wall = min(run[3] for run in runs)
+            self.stdout.write(
+                f"{'lean' if lean else 'default'} mode: GET {self.path} -> {status}, "
+                f"boot {booted * 1000:.0f} ms, first request served at "
+                f"{served * 1000:.0f} ms, process wall time {wall * 1000:.0f} ms"
+            )
+
+            modules, packages = self.parse_importtime(
+                self.run_worker(lean, importtime=True)[4]
+            )
+            self.stdout.write("  slowest packages (self time):")
+            for name, own in sorted(packages.items(), key=lambda x: -x[1])[
+                : options["top"]
+            ]:
+                self.stdout.write(f"    {own / 1000:8.1f} ms  {name}")
+            self.stdout.write("  slowest modules (cumulative):")
+            for name, cumulative in sorted(modules, key=lambda x: -x[1])[
+                : options["top"]
+            ]:
+                self.stdout.write(f"    {cumulative / 1000:8.1f} ms  {name}")
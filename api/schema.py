@@ -0,0 +1,220 @@
+import hashlib
+import os
+import sys
+import threading
+from collections import namedtuple
+from importlib.metadata import version
+
+from django.apps import apps
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.urls import URLPattern, get_resolver
+from django.views.decorators.http import condition, require_safe
+from rest_framework import permissions
+from rest_framework.request import Request
+
+from .docs import apply_schema_overrides
+
+# drf_yasg and its validators are imported only once the schema is needed
+VALIDATORS = ["ssv"]
+# apps whose models, serializers and views the schema is generated from
+SOURCE_APPS = ("api", "common", "goals", "user")
+# distributions generating the schema
+GENERATOR_PACKAGES = ("djangorestframework", "drf-yasg")
+
+SchemaDocuments = namedtuple("SchemaDocuments", ("fingerprint", "json", "yaml"))
+
+_documents = None
+_ui_views = {}
+_lock = threading.Lock()
+
+
+def get_schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="API",
+        default_version="v1",
+        description="description",
+        terms_of_service="https://akarpov.ru/about",
+        contact=openapi.Contact(email="alexander.d.karpov@gmail.com"),
+        license=openapi.License(name="BEBRA License"),
+    )
+
+
+def get_generator_class():
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    class RequestlessSchemaGenerator(OpenAPISchemaGenerator):
+        """
+        Generates the schema outside of a request, views are given an anonymous
+        request so their get_serializer_class() etc. keep working.
+        """
+
+        def create_view(self, callback, method, request=None):
+            view = super().create_view(callback, method, request)
+            if view.request is None:
+                http_request = HttpRequest()
+                http_request.method = method
+                view.request = Request(http_request)
+            return view
+
+    return RequestlessSchemaGenerator
+
+
+def _walk_patterns(patterns, prefix=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern.name, pattern.callback
+        else:
+            yield from _walk_patterns(
+                pattern.url_patterns, prefix + str(pattern.pattern)
+            )
+
+
+def get_fingerprint():
+    """
+    Hash of the URLconf routes, the source of SOURCE_APPS and of other modules
+    defining views, and versions of the generating packages. The schema is
+    regenerated when it changes.
+    """
+    digest = hashlib.sha256()
+    for package in GENERATOR_PACKAGES:
+        digest.update(f"{package}=={version(package)}\n".encode())
+
+    paths = set()
+    for label in SOURCE_APPS:
+        app_path = apps.get_app_config(label).path
+        for directory, subdirectories, files in os.walk(app_path):
+            subdirectories[:] = sorted(
+                set(subdirectories) - {"migrations", "__pycache__"}
+            )
+            paths.update(
+                os.path.join(directory, name) for name in files if name.endswith(".py")
+            )
+
+    modules = set()
+    for route, name, callback in _walk_patterns(get_resolver().url_patterns):
+        view = getattr(callback, "view_class", callback)
+        view_path = f"{view.__module__}.{view.__qualname__}"
+        digest.update(f"{route}|{name}|{view_path}\n".encode())
+        modules.add(view.__module__)
+
+    for module_name in modules:
+        path = getattr(sys.modules.get(module_name), "__file__", None)
+        if path and os.path.exists(path):
+            paths.add(path)
+
+    for path in sorted(paths):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _paths():
+    directory = settings.SCHEMA_CACHE_DIR
+    return {
+        "fingerprint": os.path.join(directory, "swagger.fingerprint"),
+        "json": os.path.join(directory, "swagger.json"),
+        "yaml": os.path.join(directory, "swagger.yaml"),
+    }
+
+
+def _read(fingerprint):
+    paths = _paths()
+    try:
+        with open(paths["fingerprint"]) as f:
+            if f.read().strip() != fingerprint:
+                return None
+        with open(paths["json"], "rb") as f:
+            json_document = f.read()
+        with open(paths["yaml"], "rb") as f:
+            yaml_document = f.read()
+    except FileNotFoundError:
+        return None
+    return SchemaDocuments(fingerprint, json_document, yaml_document)
+
+
+def _write(documents):
+    os.makedirs(settings.SCHEMA_CACHE_DIR, exist_ok=True)
+    paths = _paths()
+    # the fingerprint goes last, so a partial write is never picked up
+    for key, content in (
+        ("json", documents.json),
+        ("yaml", documents.yaml),
+        ("fingerprint", documents.fingerprint.encode()),
+    ):
+        tmp_path = paths[key] + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, paths[key])
+
+
+def generate_documents(fingerprint=None):
+    """
+    Generates and validates the schema, then stores it on disk.
+    """
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    fingerprint = fingerprint or get_fingerprint()
+    apply_schema_overrides(
+        getattr(callback, "view_class", callback)
+        for route, name, callback in _walk_patterns(get_resolver().url_patterns)
+    )
+    generator = get_generator_class()(get_schema_info())
+    schema = generator.get_schema(request=None, public=True)
+    documents = SchemaDocuments(
+        fingerprint,
+        OpenAPICodecJson(VALIDATORS).encode(schema),
+        OpenAPICodecYaml(VALIDATORS).encode(schema),
+    )
+    _write(documents)
+    return documents
+
+
+def get_documents():
+    """
+    Returns rendered schema documents from memory, from disk if they were
+    generated for the current URLconf, or generates them.
+    """
+    global _documents
+    if _documents is None:
+        with _lock:
+            if _documents is None:
+                fingerprint = get_fingerprint()
+                _documents = _read(fingerprint) or generate_documents(fingerprint)
+    return _documents
+
+
+def _etag(request, format):
+    return f"{get_documents().fingerprint[:32]}{format}"
+
+
+@require_safe
+@condition(etag_func=_etag)
+def schema_document_view(request, format):
+    documents = get_documents()
+    if format == ".yaml":
+        return HttpResponse(documents.yaml, content_type="application/yaml")
+    return HttpResponse(documents.json, content_type="application/json")
+
+
+def schema_ui_view(renderer):
+    """
+    Swagger or redoc page, built on first request. The page only loads the
+    spec from the cached documents.
+    """
+
+    def view(request, *args, **kwargs):
+        if renderer not in _ui_views:
+            from drf_yasg.views import get_schema_view
+
+            schema_view = get_schema_view(
+                get_schema_info(),
+                public=True,
+                permission_classes=(permissions.AllowAny,),
+            )
+            _ui_views[renderer] = schema_view.with_ui(renderer, cache_timeout=0)
+        return _ui_views[renderer](request, *args, **kwargs)
+
+    return view
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed
 
-from goals.models import Aim, Dream, Post
+from goals.models import Aim, Dream, Post, Notification
 from user.models import User, Subscriber, DreamAssociation
+from .batch import MAX_REQUESTS
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -39,6 +40,13 @@ class PublicSubscriberInfoSerializer(serializers.ModelSerializer):
         fields = ("user",)
 
 
+class SuggestedUserSerializer(PublicUserInfoSerializer):
+    co_subscribers = serializers.IntegerField()
+
+    class Meta(PublicUserInfoSerializer.Meta):
+        fields = ("slug", "email", "first_name", "last_name", "co_subscribers")
+
+
 class RetrieveUserSerializer(serializers.ModelSerializer):
     subscribers = PublicSubscriberInfoSerializer(many=True)
 
@@ -71,7 +79,26 @@ class SubscriberSerializer(serializers.ModelSerializer):
         raise AuthenticationFailed("User is not authenticated")
 
 
-class PutevoditelSerializer(serializers.ModelSerializer):
+class SparseFieldsetSerializerMixin:
+    """Takes an optional `fields` argument to serialize only the listed fields"""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            unknown = set(fields) - set(self.fields)
+            if unknown:
+                raise serializers.ValidationError(
+                    {"fields": [f"Unknown field: {name}" for name in sorted(unknown)]}
+                )
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class PutevoditelSerializer(
+    SparseFieldsetSerializerMixin, serializers.ModelSerializer
+):
     images = serializers.ListSerializer(child=serializers.ImageField())
 
     class Meta:
@@ -128,10 +155,11 @@ class DreamAssociationSerializer(serializers.ModelSerializer):
 class AimSerializer(serializers.ModelSerializer):
     class Meta:
         model = Aim
-        fields = ("id", "name", "description", "created_at", "deadline")
+        fields = ("id", "name", "description", "created_at", "deadline", "version")
         extra_kwargs = {
             "created_at": {"read_only": True},
             "id": {"read_only": True},
+            "version": {"read_only": True},
         }
 
     def create(self, validated_data):
@@ -143,10 +171,11 @@ class AimSerializer(serializers.ModelSerializer):
 class DreamSerializer(serializers.ModelSerializer):
     class Meta:
         model = Dream
-        fields = ("id", "name", "description", "created_at")
+        fields = ("id", "name", "description", "created_at", "version")
         extra_kwargs = {
             "created_at": {"read_only": True},
             "id": {"read_only": True},
+            "version": {"read_only": True},
         }
 
     def create(self, validated_data):
@@ -155,12 +184,34 @@ class DreamSerializer(serializers.ModelSerializer):
         return dream
 
 
+class GoalChangesSerializer(serializers.Serializer):
+    token = serializers.CharField()
+    aims = AimSerializer(many=True)
+    dreams = DreamSerializer(many=True)
+    deleted_aims = serializers.ListField(child=serializers.IntegerField())
+    deleted_dreams = serializers.ListField(child=serializers.IntegerField())
+
+
+class WeeklyGoalStatsSerializer(serializers.Serializer):
+    aims_created = serializers.IntegerField()
+    dreams_created = serializers.IntegerField()
+    dreams_converted = serializers.IntegerField()
+
+
+class GoalStatsSerializer(serializers.Serializer):
+    aims = serializers.IntegerField()
+    overdue_aims = serializers.IntegerField()
+    dreams = serializers.IntegerField()
+    dreams_converted = serializers.IntegerField()
+    this_week = WeeklyGoalStatsSerializer()
+
+
 class DreamToAimSerializer(serializers.Serializer):
     deadline = serializers.DateTimeField(required=True)
 
 
 class PostSerializer(serializers.ModelSerializer):
-    creator = PublicUserInfoSerializer()
+    creator = PublicUserInfoSerializer(read_only=True)
 
     class Meta:
         model = Post
@@ -169,3 +220,69 @@ class PostSerializer(serializers.ModelSerializer):
             "id": {"read_only": True},
             "created_at": {"read_only": True},
         }
+
+
+class ProfilePostSerializer(PostSerializer):
+    class Meta(PostSerializer.Meta):
+        fields = ("id", "name", "video", "description", "created_at")
+
+
+class InspirerProfileSerializer(UserSerializer):
+    """Schema of user.profiles documents"""
+
+    active_aims = serializers.IntegerField()
+    recent_posts = ProfilePostSerializer(many=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + (
+            "subscriber_count",
+            "active_aims",
+            "recent_posts",
+        )
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    post = PostSerializer()
+
+    class Meta:
+        model = Notification
+        fields = ("id", "post", "created_at")
+
+
+class ReadNotificationsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=1000
+    )
+
+
+class ReadNotificationsResponseSerializer(serializers.Serializer):
+    updated = serializers.IntegerField()
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=("GET", "POST", "PUT", "PATCH", "DELETE"), default="GET"
+    )
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f"Ensure this field has no more than {MAX_REQUESTS} elements."
+            )
+        return value
+
+
+class BatchResultSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = BatchResultSerializer(many=True)
@@ -1,3 +1,354 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import TransactionTestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APITestCase
+from rest_framework.views import APIView
+
+from api.throttling import rate_limit
+from goals.archive import archive_aims
+from goals.models import Aim, ArchivedAim, Dream
+from user.models import User
+
+
+def make_user(email):
+    return User.objects.create(email=email, first_name="F", last_name="L")
+
+
+class VersionedObjectTests(APITestCase):
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        self.client.force_authenticate(self.user)
+        self.aim = Aim.objects.create(
+            user=self.user,
+            name="aim",
+            description="description",
+            deadline=timezone.now() + timedelta(days=30),
+        )
+        self.url = f"/api/goals/aim/{self.aim.id}"
+
+    def test_retrieve_sends_version_as_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"1"')
+
+    def test_unchanged_object_is_not_modified(self):
+        for tag in ('"1"', 'W/"1"', '"5", W/"1"', "*"):
+            with self.subTest(tag=tag):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=tag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response["ETag"], '"1"')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_compressed_etag_is_not_modified(self):
+        Aim.objects.filter(id=self.aim.id).update(description="x" * 4096)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["ETag"], 'W/"1"')
+
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_update_with_current_version(self):
+        response = self.client.patch(
+            self.url, {"name": "new"}, format="json", HTTP_IF_MATCH='W/"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(response.data["version"], 2)
+        self.assertEqual(response.data["name"], "new")
+
+    def test_update_with_stale_version_fails(self):
+        self.client.patch(self.url, {"name": "first"}, format="json")
+        response = self.client.patch(
+            self.url, {"name": "second"}, format="json", HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.aim.refresh_from_db()
+        self.assertEqual((self.aim.name, self.aim.version), ("first", 2))
+
+    def test_delete_with_stale_version_fails(self):
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertTrue(Aim.objects.filter(id=self.aim.id).exists())
+
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Aim.objects.filter(id=self.aim.id).exists())
+
+    def test_other_users_object_is_forbidden(self):
+        self.client.force_authenticate(make_user("other@example.com"))
+        response = self.client.patch(
+            self.url, {"name": "new"}, format="json", HTTP_IF_MATCH='"1"'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ArchivedAimTests(APITestCase):
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        self.client.force_authenticate(self.user)
+        for name, days in (("old", -400), ("current", 30)):
+            Aim.objects.create(
+                user=self.user,
+                name=name,
+                description="description",
+                deadline=timezone.now() + timedelta(days=days),
+            )
+        self.assertEqual(archive_aims(timezone.now() - timedelta(days=365)), 1)
+        self.archived = ArchivedAim.objects.get()
+        self.url = f"/api/goals/aim/{self.archived.id}"
+
+    def list_names(self, query=""):
+        response = self.client.get(f"/api/goals/aim/{query}")
+        return [aim["name"] for aim in response.data["results"]]
+
+    def test_archived_aims_are_listed_on_request(self):
+        self.assertEqual(self.list_names(), ["current"])
+        self.assertEqual(self.list_names("?include_archived=true"), ["old", "current"])
+        response = self.client.get(
+            f"/api/user/{self.user.slug}/aims/?include_archived=true"
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_archived_aim_is_read_only(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "old")
+
+        response = self.client.patch(self.url, {"name": "new"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_archived_aim_can_be_deleted(self):
+        self.assertEqual(self.client.get("/api/goals/stats/").data["aims"], 2)
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"2"')
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+
+        response = self.client.delete(self.url, HTTP_IF_MATCH='"1"')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(ArchivedAim.objects.exists())
+        stats = self.client.get("/api/goals/stats/").data
+        self.assertEqual((stats["aims"], stats["overdue_aims"]), (1, 0))
+
+    def test_other_users_archived_aim_is_forbidden(self):
+        self.client.force_authenticate(make_user("other@example.com"))
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertTrue(ArchivedAim.objects.exists())
+
+
+class GoalStatsTests(APITestCase):
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        self.client.force_authenticate(self.user)
+
+    def stats(self):
+        response = self.client.get("/api/goals/stats/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def create_aim(self, days):
+        deadline = timezone.now() + timedelta(days=days)
+        response = self.client.post(
+            "/api/goals/aim/",
+            {"name": "aim", "description": "description", "deadline": deadline},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return f"/api/goals/aim/{response.data['id']}"
+
+    def test_aims_are_counted(self):
+        current = self.create_aim(30)
+        overdue = self.create_aim(-2)
+        stats = self.stats()
+        self.assertEqual((stats["aims"], stats["overdue_aims"]), (2, 1))
+        self.assertEqual(stats["this_week"]["aims_created"], 2)
+
+        deadline = timezone.now() - timedelta(days=5)
+        self.client.patch(current, {"deadline": deadline}, format="json")
+        stats = self.stats()
+        self.assertEqual((stats["aims"], stats["overdue_aims"]), (2, 2))
+
+        self.client.delete(overdue)
+        stats = self.stats()
+        self.assertEqual((stats["aims"], stats["overdue_aims"]), (1, 1))
+        # weekly numbers count activity
+        self.assertEqual(stats["this_week"]["aims_created"], 2)
+
+    def test_converted_dreams_are_counted(self):
+        dream = Dream.objects.create(user=self.user, name="dream", description="")
+        self.assertEqual(self.stats()["dreams"], 1)
+
+        deadline = timezone.now() + timedelta(days=30)
+        response = self.client.post(
+            f"/api/goals/dream/{dream.id}/dream_to_aim",
+            {"deadline": deadline},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        stats = self.stats()
+        self.assertEqual(
+            (stats["aims"], stats["dreams"], stats["dreams_converted"]), (1, 0, 1)
+        )
+        self.assertEqual(
+            stats["this_week"],
+            {"aims_created": 0, "dreams_created": 1, "dreams_converted": 1},
+        )
+
+
+class BatchTests(APITestCase):
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        self.client.force_authenticate(self.user)
+
+    def batch(self, requests, parallel=False):
+        response = self.client.post(
+            "/api/batch/", {"requests": requests, "parallel": parallel}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["responses"]
+
+    def test_requests_run_in_order(self):
+        aim = {
+            "name": "aim",
+            "description": "description",
+            "deadline": "2030-01-01T00:00:00Z",
+        }
+        responses = self.batch(
+            [
+                {"method": "POST", "path": "goals/aim/", "body": aim},
+                {"path": "/api/goals/aim/"},
+                {"path": "goals/stats/"},
+            ]
+        )
+        self.assertEqual(
+            [response["status"] for response in responses], [201, 200, 200]
+        )
+        self.assertEqual(responses[1]["body"]["results"][0]["name"], "aim")
+        self.assertEqual(responses[2]["body"]["aims"], 1)
+
+    def test_nested_batch_is_rejected(self):
+        nested = {"requests": [{"path": "goals/stats/"}]}
+        responses = self.batch([{"method": "POST", "path": "batch/", "body": nested}])
+        self.assertEqual(responses[0]["status"], status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(responses[0]["body"]["detail"], "Batches can't be nested.")
+
+    def test_unknown_path_is_not_found(self):
+        responses = self.batch([{"path": "unknown/"}, {"path": "goals/stats/"}])
+        self.assertEqual([response["status"] for response in responses], [404, 200])
+
+
+class ParallelBatchTests(TransactionTestCase):
+    # sub-requests run in threads with their own database connections, which
+    # only see committed rows
+
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        Dream.objects.create(user=self.user, name="dream", description="")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_reads_run_in_parallel_between_writes(self):
+        requests = [
+            {"path": "goals/dream/"},
+            {"path": "goals/stats/"},
+            {"method": "DELETE", "path": f"goals/dream/{Dream.objects.get().id}"},
+            {"path": "goals/dream/"},
+            {"path": "goals/stats/"},
+        ]
+        response = self.client.post(
+            "/api/batch/", {"requests": requests, "parallel": True}, format="json"
+        )
+        responses = response.data["responses"]
+        self.assertEqual(
+            [response["status"] for response in responses], [200, 200, 204, 200, 200]
+        )
+        self.assertEqual(responses[0]["body"]["count"], 1)
+        self.assertEqual(responses[1]["body"]["dreams"], 1)
+        self.assertEqual(responses[3]["body"]["count"], 0)
+        self.assertEqual(responses[4]["body"]["dreams"], 0)
+
+
+class LimitedApi(APIView):
+    def get(self, request, *args, **kwargs):
+        return Response({})
+
+
+urlpatterns = [
+    path(
+        "limited/",
+        LimitedApi.as_view(throttle_classes=rate_limit(user="2/min", ip="1/min")),
+    ),
+    path("overloaded/", LimitedApi.as_view(throttle_classes=rate_limit(total="2/min"))),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class RateLimitTests(APITestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(
+            RATE_LIMIT_PATH=os.path.join(directory.name, "buckets.sqlite3")
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def assertRetryAfter(self, response, status_code, seconds):
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(response["Retry-After"], str(seconds))
+
+    def test_user_over_limit_is_throttled(self):
+        self.client.force_authenticate(make_user("user@example.com"))
+        for _ in range(2):
+            self.assertEqual(self.client.get("/limited/").status_code, 200)
+        self.assertRetryAfter(
+            self.client.get("/limited/"), status.HTTP_429_TOO_MANY_REQUESTS, 30
+        )
+
+        other = APIClient()
+        other.force_authenticate(make_user("other@example.com"))
+        self.assertEqual(other.get("/limited/").status_code, 200)
+
+    def test_anonymous_requests_are_limited_by_ip(self):
+        self.assertEqual(self.client.get("/limited/").status_code, 200)
+        self.assertRetryAfter(
+            self.client.get("/limited/"), status.HTTP_429_TOO_MANY_REQUESTS, 60
+        )
+        # without proxies the header is set by the client
+        response = self.client.get("/limited/", HTTP_X_FORWARDED_FOR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        response = self.client.get("/limited/", REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 200)
+
+    def test_ip_is_forwarded_by_proxies(self):
+        with self.settings(REST_FRAMEWORK={"NUM_PROXIES": 1}):
+            for client_ip in ("10.0.0.1", "10.0.0.2"):
+                response = self.client.get(
+                    "/limited/", HTTP_X_FORWARDED_FOR=f"1.1.1.1, {client_ip}"
+                )
+                self.assertEqual(response.status_code, 200)
+            response = self.client.get(
+                "/limited/", HTTP_X_FORWARDED_FOR="2.2.2.2, 10.0.0.1"
+            )
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_overloaded_route_sheds_requests(self):
+        for i in range(2):
+            self.client.force_authenticate(make_user(f"user{i}@example.com"))
+            self.assertEqual(self.client.get("/overloaded/").status_code, 200)
+
+        self.client.force_authenticate(make_user("late@example.com"))
+        response = self.client.get("/overloaded/")
+        self.assertRetryAfter(response, status.HTTP_503_SERVICE_UNAVAILABLE, 30)
+        self.assertEqual(response.data["detail"].code, "overloaded")
@@ -0,0 +1,82 @@
+from functools import partial
+
+from rest_framework.throttling import BaseThrottle
+
+from common.ratelimit import Bucket, buckets
+from .exceptions import Overloaded
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_rate(rate):
+    """
+    "<requests>/<period>" like "20/min" to (capacity, tokens per second),
+    so up to 20 requests can be made at once and the bucket refills in a
+    minute.
+    """
+    if rate is None:
+        return None
+    count, period = rate.split("/")
+    count = int(count)
+    return count, count / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Takes a token from the user's bucket of the view, or the IP's one for
+    anonymous requests, and from the view's total bucket. An empty user or
+    IP bucket rejects the request with 429, an empty total one sheds it with
+    503, both with Retry-After.
+    """
+
+    def __init__(self, user=None, ip=None, total=None, methods=None):
+        self.user, self.ip, self.total = user, ip, total
+        self.methods = methods
+        self.retry_after = None
+
+    def get_buckets(self, request, view):
+        scope = type(view).__name__
+        if self.methods:
+            # a view can be limited per method by several throttles
+            scope += ":" + ",".join(sorted(self.methods))
+        if request.user.is_authenticated:
+            limits = [(f"{scope}:user:{request.user.pk}", self.user)]
+        else:
+            limits = [(f"{scope}:ip:{self.get_ident(request)}", self.ip)]
+        limits.append((f"{scope}:total", self.total))
+        return [Bucket(key, *limit) for key, limit in limits if limit]
+
+    def allow_request(self, request, view):
+        if self.methods and request.method not in self.methods:
+            return True
+        request_buckets = self.get_buckets(request, view)
+        if not request_buckets:
+            return True
+        empty = buckets.take(request_buckets)
+        if empty is None:
+            return True
+
+        bucket, self.retry_after = empty
+        if bucket.key.endswith(":total"):
+            raise Overloaded(self.retry_after)
+        return False
+
+    def wait(self):
+        return self.retry_after
+
+
+def rate_limit(user=None, ip=None, total=None, methods=None):
+    """
+    Throttle classes limiting a view, used in urls.py like
+    View.as_view(throttle_classes=rate_limit(user="20/min")). Limits of
+    omitted kinds aren't applied.
+    """
+    return [
+        partial(
+            TokenBucketThrottle,
+            user=parse_rate(user),
+            ip=parse_rate(ip),
+            total=parse_rate(total),
+            methods=methods,
+        )
+    ]
@@ -14,24 +14,74 @@ from api.views import (
     DreamApi,
     ChangeDreamApi,
     DreamToAimApi,
+    GoalChangesApi,
+    GoalStatsApi,
+    UserGoalStatsApi,
+    UserSuggestionsApi,
+    InspirerProfileApi,
     UserAimApi,
     PostApi,
+    NotificationApi,
+    ReadNotificationsApi,
+    BatchApi,
 )
+from api.throttling import rate_limit
+
+# public pages and lists that can be scraped
+PUBLIC_RATES = {"user": "120/min", "ip": "60/min"}
+PUBLIC_LIMITS = rate_limit(**PUBLIC_RATES)
 
 urlpatterns = [
     # auth
-    path("auth/token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("auth/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
-    path("auth/register/", RegisterApi.as_view(), name="user_register"),
+    path(
+        "auth/token/",
+        TokenObtainPairView.as_view(throttle_classes=rate_limit(ip="10/min")),
+        name="token_obtain_pair",
+    ),
+    path(
+        "auth/refresh/",
+        TokenRefreshView.as_view(throttle_classes=rate_limit(ip="30/min")),
+        name="token_refresh",
+    ),
+    path(
+        "auth/register/",
+        RegisterApi.as_view(throttle_classes=rate_limit(ip="5/min")),
+        name="user_register",
+    ),
     # ==========================================================================================
     # user
     path(
-        "user/<str:slug>/subscribers/", SubscriberApi.as_view(), name="list_subscribers"
+        "user/<str:slug>/subscribers/",
+        SubscriberApi.as_view(throttle_classes=PUBLIC_LIMITS),
+        name="list_subscribers",
+    ),
+    path(
+        "user/<str:slug>/aims/",
+        UserAimApi.as_view(throttle_classes=PUBLIC_LIMITS),
+        name="list_user_aims",
+    ),
+    path(
+        "user/<str:slug>/stats/",
+        UserGoalStatsApi.as_view(throttle_classes=PUBLIC_LIMITS),
+        name="user_goal_stats",
+    ),
+    path(
+        "user/<str:slug>/profile/",
+        InspirerProfileApi.as_view(throttle_classes=PUBLIC_LIMITS),
+        name="inspirer_profile",
+    ),
+    path(
+        "user/<str:slug>/suggestions/",
+        UserSuggestionsApi.as_view(throttle_classes=PUBLIC_LIMITS),
+        name="user_suggestions",
     ),
-    path("user/<str:slug>/aims/", UserAimApi.as_view(), name="list_user_aims"),
     path("user/form/", PutevoditelApi.as_view(), name="putevoditel_form"),
     path(
-        "user/form/image/", PutevoditelImageApi.as_view(), name="putevoditel_image_form"
+        "user/form/image/",
+        PutevoditelImageApi.as_view(
+            throttle_classes=rate_limit(user="10/min", total="300/min")
+        ),
+        name="putevoditel_image_form",
     ),
     # ==========================================================================================
     # goals
@@ -44,7 +94,27 @@ urlpatterns = [
         DreamToAimApi.as_view(),
         name="convert_dream_to_aim",
     ),
+    path("goals/changes/", GoalChangesApi.as_view(), name="list_goal_changes"),
+    path("goals/stats/", GoalStatsApi.as_view(), name="goal_stats"),
     # ==========================================================================================
     # posts
-    path("posts/", PostApi.as_view(), name="list_create_post"),
+    path(
+        "posts/",
+        PostApi.as_view(
+            throttle_classes=rate_limit(**PUBLIC_RATES, methods=["GET"])
+            + rate_limit(user="10/h", total="60/min", methods=["POST"])
+        ),
+        name="list_create_post",
+    ),
+    # ==========================================================================================
+    # notifications
+    path("notifications/", NotificationApi.as_view(), name="list_notifications"),
+    path(
+        "notifications/read/",
+        ReadNotificationsApi.as_view(),
+        name="read_notifications",
+    ),
+    # ==========================================================================================
+    # batch
+    path("batch/", BatchApi.as_view(), name="batch"),
 ]
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializer import AimSerializer, DreamSerializer, PostSerializer
+
+# fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+
+
+def _file_converter(field, model_field):
+    storage = model_field.storage
+
+    if not getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name, context: name or None
+
+    def convert(name, context):
+        if not name:
+            return None
+        url = storage.url(name)
+        request = context.get("request")
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    return convert
+
+
+def _datetime_converter(field):
+    to_representation = field.to_representation
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if (
+        not settings.USE_TZ
+        or "timezone" in field.__dict__
+        or output_format is None
+        or output_format.lower() != ISO_8601
+    ):
+        return lambda value, context: to_representation(value)
+
+    def convert(value, context):
+        if value.tzinfo is None:
+            return to_representation(value)
+        value = value.astimezone(timezone.get_current_timezone()).isoformat()
+        if value.endswith("+00:00"):
+            return value[:-6] + "Z"
+        return value
+
+    return convert
+
+
+def _converter(field, model):
+    if isinstance(field, IDENTITY_FIELDS):
+        return None
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.FileField):
+        return _file_converter(field, model._meta.get_field(field.source))
+    to_representation = field.to_representation
+    return lambda value, context: to_representation(value)
+
+
+def _compile(serializer, prefix=""):
+    """
+    Turns serializer fields into (field_name, column, converter) entries,
+    nested serializers become (field_name, None, nested_plan).
+    """
+    model = serializer.Meta.model
+    plan = []
+    for field in serializer._readable_fields:
+        if field.source == "*" or "." in field.source:
+            raise ImproperlyConfigured(
+                f"Field '{field.field_name}' can't be read from .values() rows"
+            )
+        column = prefix + field.source
+        if isinstance(field, serializers.BaseSerializer):
+            if getattr(field, "many", False) or model._meta.get_field(
+                field.source
+            ).null:
+                raise ImproperlyConfigured(
+                    f"Nested field '{field.field_name}' must be a non-null foreign key"
+                )
+            plan.append((field.field_name, None, _compile(field, column + "__")))
+        else:
+            plan.append((field.field_name, column, _converter(field, model)))
+    return plan
+
+
+def _columns(plan):
+    for field_name, column, converter in plan:
+        if column is None:
+            yield from _columns(converter)
+        else:
+            yield column
+
+
+def _build(plan, row, context):
+    ret = {}
+    for field_name, column, converter in plan:
+        if column is None:
+            ret[field_name] = _build(converter, row, context)
+        else:
+            value = row[column]
+            if value is not None and converter is not None:
+                value = converter(value, context)
+            ret[field_name] = value
+    return ret
+
+
+class ValuesSerializer:
+    """
+    Read-only list serializer working on ``.values()`` rows.
+
+    Produces the same output as ``serializer_class(many=True)`` without
+    instantiating model objects, field mapping is compiled once per class.
+    """
+
+    serializer_class = None
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.plan, self.columns = self.get_plan()
+
+    @classmethod
+    def get_plan(cls):
+        if "_plan" not in cls.__dict__:
+            if cls.serializer_class is None:
+                raise ImproperlyConfigured(
+                    f"{cls.__name__} should include a `serializer_class` attribute"
+                )
+            plan = _compile(cls.serializer_class())
+            cls._plan = (plan, tuple(_columns(plan)))
+        return cls._plan
+
+    def get_values(self, queryset):
+        return queryset.values(*self.columns)
+
+    def serialize(self, rows):
+        plan, context = self.plan, self.context
+        return [_build(plan, row, context) for row in rows]
+
+
+class AimValuesSerializer(ValuesSerializer):
+    serializer_class = AimSerializer
+
+
+class DreamValuesSerializer(ValuesSerializer):
+    serializer_class = DreamSerializer
+
+
+class PostValuesSerializer(ValuesSerializer):
+    serializer_class = PostSerializer
@@ -1,37 +1,223 @@
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
-from drf_yasg.utils import swagger_auto_schema, no_body
-from rest_framework import generics, mixins, status
+from django.utils import timezone
+from rest_framework import generics, mixins, serializers, status
 from rest_framework.authentication import SessionAuthentication, BasicAuthentication
 from rest_framework.decorators import permission_classes, authentication_classes
-from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import (
+    AuthenticationFailed,
+    NotFound,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from goals.models import Aim, Dream, Post
-from user.models import User, Subscriber, DreamAssociation
+from goals.models import (
+    Aim,
+    ArchivedAim,
+    Dream,
+    Post,
+    Notification,
+    aim_deadline_changed,
+)
+from goals.stats import get_stats
+from goals.sync import TokenExpired, get_changes, parse_token
+from user.graph import follow_graph
+from user.models import User, Subscriber, DreamAssociation, InspirerProfile
+from user.profiles import rebuild_profile
+from .batch import run_batch
+from .docs import QueryParameter, swagger_auto_schema, no_body
+from .exceptions import FullResyncRequired, PreconditionFailed
 from .serializer import (
     RegisterSerializer,
     UserSerializer,
     RetrieveUserSerializer,
+    SuggestedUserSerializer,
+    InspirerProfileSerializer,
     SubscriberSerializer,
     PutevoditelSerializer,
     DreamAssociationSerializer,
     AimSerializer,
     DreamSerializer,
     DreamToAimSerializer,
+    GoalChangesSerializer,
+    GoalStatsSerializer,
     PostSerializer,
+    NotificationSerializer,
+    ReadNotificationsSerializer,
+    ReadNotificationsResponseSerializer,
+    BatchSerializer,
+    BatchResponseSerializer,
+)
+from .values_serializer import (
+    AimValuesSerializer,
+    DreamValuesSerializer,
+    PostValuesSerializer,
 )
 
 
+MAX_SUGGESTIONS = 50
+
+
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 100
     page_size_query_param = "page_size"
     max_page_size = 1000
 
 
+class NotificationPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering = "-created_at"
+
+
+class ValuesListModelMixin(mixins.ListModelMixin):
+    """Lists queryset through ``values_serializer_class`` instead of model instances"""
+
+    values_serializer_class = None
+
+    def get_values(self, serializer):
+        return serializer.get_values(self.filter_queryset(self.get_queryset()))
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class(
+            context=self.get_serializer_context()
+        )
+        queryset = self.get_values(serializer)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+
+        return Response(serializer.serialize(queryset))
+
+
+class ArchivedAimsMixin:
+    """Adds archived aims to listed ones if ``?include_archived=true`` is passed"""
+
+    def get_archived_queryset(self):
+        return ArchivedAim.objects.filter(user=self.request.user)
+
+    def include_archived(self):
+        value = self.request.GET.get("include_archived")
+        if value is None:
+            return False
+        try:
+            return serializers.BooleanField().to_internal_value(value)
+        except ValidationError:
+            raise ValidationError({"include_archived": "Must be a boolean"})
+
+    def get_values(self, serializer):
+        values = super().get_values(serializer)
+        if not self.include_archived():
+            return values
+        archived = serializer.get_values(self.get_archived_queryset())
+        return values.union(archived, all=True).order_by("deadline")
+
+
+class VersionedObjectMixin:
+    """
+    Retrieves, updates and deletes user's object by id with optimistic
+    concurrency. Responses carry the object's version as ETag, writes sent
+    with an If-Match of another version fail with 412. An update is a single
+    conditional UPDATE followed by one fetch.
+    """
+
+    model = None
+    permission_denied_message = None
+
+    @staticmethod
+    def get_etag(instance):
+        return f'"{instance.version}"'
+
+    def get_owned_rows(self, model=None):
+        if not self.request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+        model = model or self.model
+        return model.objects.filter(id=self.kwargs["id"], user=self.request.user)
+
+    def get_object(self):
+        if not self.request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+        instance = self.get_instance()
+        if instance.user_id != self.request.user.id:
+            raise PermissionDenied(self.permission_denied_message)
+        return instance
+
+    @staticmethod
+    def parse_versions(header):
+        # weak comparison, compressed responses carry W/ etags
+        versions = []
+        for tag in header.split(","):
+            tag = tag.strip().removeprefix("W/").strip('"')
+            if tag.isdigit():
+                versions.append(int(tag))
+        return versions
+
+    def get_instance(self):
+        return get_object_or_404(self.model, id=self.kwargs["id"])
+
+    def filter_if_match(self, rows):
+        header = self.request.headers.get("If-Match")
+        if header is None or header.strip() == "*":
+            return rows
+        return rows.filter(version__in=self.parse_versions(header))
+
+    def raise_not_written(self):
+        # raises 404 or 403 if that's why no row matched
+        self.get_object()
+        raise PreconditionFailed()
+
+    def get_versioned_response(self, instance):
+        return Response(
+            self.get_serializer(instance).data,
+            status=status.HTTP_200_OK,
+            headers={"ETag": self.get_etag(instance)},
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(instance)
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None and (
+            if_none_match.strip() == "*"
+            or instance.version in self.parse_versions(if_none_match)
+        ):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return self.get_versioned_response(instance)
+
+    def update_rows(self, rows, values):
+        return rows.update(
+            **values, version=F("version") + 1, updated_at=timezone.now()
+        )
+
+    def update(self, request, *args, partial=False, **kwargs):
+        serializer = self.get_serializer(data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        rows = self.filter_if_match(self.get_owned_rows())
+        with transaction.atomic():
+            updated = self.update_rows(rows, serializer.validated_data)
+        if not updated:
+            self.raise_not_written()
+        return self.get_versioned_response(
+            get_object_or_404(self.model, id=self.kwargs["id"])
+        )
+
+    def destroy(self, request, *args, **kwargs):
+        deleted, _ = self.filter_if_match(self.get_owned_rows()).delete()
+        if not deleted:
+            self.raise_not_written()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class RegisterApi(generics.GenericAPIView, mixins.CreateModelMixin):
     """Creates a new user with login and password."""
 
@@ -69,7 +255,11 @@ class SubscriberApi(
         return self.retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        return serializer.save(user=self.request.user, slug=self.kwargs["slug"])
+        author = serializer.save(user=self.request.user, slug=self.kwargs["slug"])
+        transaction.on_commit(
+            lambda: follow_graph.subscribe(author.id, self.request.user.id)
+        )
+        return author
 
     @permission_classes([IsAuthenticated])
     @authentication_classes([SessionAuthentication, BasicAuthentication])
@@ -81,9 +271,17 @@ class SubscriberApi(
         return Response(RetrieveUserSerializer(instance).data, status.HTTP_201_CREATED)
 
     def perform_destroy(self):
-        Subscriber.objects.filter(
+        subscriptions = Subscriber.objects.filter(
             user=self.request.user, author__slug=self.kwargs["slug"]
-        ).delete()
+        )
+        author_ids = list(subscriptions.values_list("author_id", flat=True))
+        subscriptions.delete()
+        for author_id in author_ids:
+            transaction.on_commit(
+                lambda author_id=author_id: follow_graph.unsubscribe(
+                    author_id, self.request.user.id
+                )
+            )
 
     @permission_classes([IsAuthenticated])
     @authentication_classes([SessionAuthentication, BasicAuthentication])
@@ -101,6 +299,23 @@ class PutevoditelApi(
     serializer_class = PutevoditelSerializer
     queryset = User.objects.all()
 
+    def get_fields(self):
+        fields = self.request.query_params.get("fields")
+        if self.request.method != "GET" or fields is None:
+            return None
+        return [name for name in fields.split(",") if name]
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_fields()
+        if fields is not None:
+            kwargs["fields"] = fields
+        return super().get_serializer(*args, **kwargs)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            QueryParameter("fields", "Comma separated list of fields to return")
+        ]
+    )
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
 
@@ -139,15 +354,26 @@ class PutevoditelImageApi(generics.GenericAPIView, mixins.CreateModelMixin):
         return Response(status=status.HTTP_201_CREATED)
 
 
-class AimApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
-    """Lists user's aims and creates new"""
+class AimApi(
+    ArchivedAimsMixin,
+    generics.GenericAPIView,
+    ValuesListModelMixin,
+    mixins.CreateModelMixin,
+):
+    """Lists user's active aims and creates new"""
 
     serializer_class = AimSerializer
+    values_serializer_class = AimValuesSerializer
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
         return Aim.objects.filter(user=self.request.user)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            QueryParameter("include_archived", "also list archived aims")
+        ]
+    )
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
@@ -157,52 +383,68 @@ class AimApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelM
         return self.create(request, *args, **kwargs)
 
 
-class ChangeAimApi(
-    generics.GenericAPIView,
-    mixins.UpdateModelMixin,
-    mixins.DestroyModelMixin,
-    mixins.RetrieveModelMixin,
-):
-    """Updates and deletes user's aim by id"""
+class ChangeAimApi(VersionedObjectMixin, generics.GenericAPIView):
+    """
+    Updates and deletes user's aim by id. Archived aims can be retrieved and
+    deleted, but not changed.
+    """
 
+    model = Aim
     serializer_class = AimSerializer
-    pagination_class = StandardResultsSetPagination
     lookup_field = "id"
-
-    def get_object(self):
-        if not self.request.user.is_authenticated:
-            raise AuthenticationFailed("User is not authenticated")
-        aim = get_object_or_404(Aim, id=self.kwargs["id"])
-        if aim.user != self.request.user:
-            raise PermissionDenied("You can't change aim of other user")
-        return aim
+    permission_denied_message = "You can't change aim of other user"
+
+    def get_instance(self):
+        instance = Aim.objects.filter(id=self.kwargs["id"]).first()
+        return instance or get_object_or_404(ArchivedAim, id=self.kwargs["id"])
+
+    def raise_not_written(self):
+        archived = isinstance(self.get_object(), ArchivedAim)
+        if archived and self.request.method != "DELETE":
+            raise PermissionDenied("Archived aims can't be changed")
+        raise PreconditionFailed()
+
+    def destroy(self, request, *args, **kwargs):
+        rows = self.filter_if_match(self.get_owned_rows(ArchivedAim))
+        if rows.delete()[0]:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        return super().destroy(request, *args, **kwargs)
+
+    def update_rows(self, rows, values):
+        if "deadline" not in values:
+            return super().update_rows(rows, values)
+        old_deadline = (
+            rows.select_for_update().values_list("deadline", flat=True).first()
+        )
+        updated = super().update_rows(rows, values)
+        if updated:
+            aim_deadline_changed.send(
+                sender=Aim,
+                user_id=self.request.user.id,
+                old_deadline=old_deadline,
+                deadline=values["deadline"],
+            )
+        return updated
 
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
-        self.update(request, *args, **kwargs)
-        return Response(
-            AimSerializer(self.request.user).data, status=status.HTTP_200_OK
-        )
+        return self.update(request, *args, **kwargs)
 
     def patch(self, request, *args, **kwargs):
-        self.partial_update(request, *args, **kwargs)
-        return Response(
-            AimSerializer(self.get_object()).data, status=status.HTTP_200_OK
-        )
+        return self.update(request, *args, partial=True, **kwargs)
 
     def delete(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.destroy(request, *args, **kwargs)
 
 
-class DreamApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class DreamApi(generics.GenericAPIView, ValuesListModelMixin, mixins.CreateModelMixin):
     """Lists user's dreams and creates new"""
 
     pagination_class = StandardResultsSetPagination
     serializer_class = DreamSerializer
+    values_serializer_class = DreamValuesSerializer
 
     def get_queryset(self):
         return Dream.objects.filter(user=self.request.user)
@@ -218,45 +460,25 @@ class DreamApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateMode
         return self.list(request, *args, **kwargs)
 
 
-class ChangeDreamApi(
-    generics.GenericAPIView,
-    mixins.UpdateModelMixin,
-    mixins.DestroyModelMixin,
-    mixins.RetrieveModelMixin,
-):
+class ChangeDreamApi(VersionedObjectMixin, generics.GenericAPIView):
     """Updates and deletes user's dreams by id"""
 
+    model = Dream
     serializer_class = DreamSerializer
-    pagination_class = StandardResultsSetPagination
     lookup_field = "id"
-
-    def get_object(self):
-        if not self.request.user.is_authenticated:
-            raise AuthenticationFailed("User is not authenticated")
-        dream = get_object_or_404(Dream, id=self.kwargs["id"])
-        if dream.user != self.request.user:
-            raise PermissionDenied("You can't change aim of other user")
-        return dream
+    permission_denied_message = "You can't change dream of other user"
 
     def get(self, request, *args, **kwargs):
         return self.retrieve(request, *args, **kwargs)
 
     def put(self, request, *args, **kwargs):
-        self.update(request, *args, **kwargs)
-        return Response(
-            DreamSerializer(self.request.user).data, status=status.HTTP_200_OK
-        )
+        return self.update(request, *args, **kwargs)
 
     def patch(self, request, *args, **kwargs):
-        self.partial_update(request, *args, **kwargs)
-        return Response(
-            DreamSerializer(self.get_object()).data, status=status.HTTP_200_OK
-        )
+        return self.update(request, *args, partial=True, **kwargs)
 
     def delete(self, request, *args, **kwargs):
-        instance = self.get_object()
-        instance.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        return self.destroy(request, *args, **kwargs)
 
 
 class DreamToAimApi(APIView):
@@ -271,27 +493,167 @@ class DreamToAimApi(APIView):
             raise PermissionDenied("You can't change aim of other user")
         serializer = DreamToAimSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        aim = dream.dream_to_aim(serializer.data["deadline"])
+        aim = dream.dream_to_aim(serializer.validated_data["deadline"])
         return Response(AimSerializer(aim).data, status=status.HTTP_201_CREATED)
 
 
-class UserAimApi(generics.GenericAPIView, mixins.ListModelMixin):
-    """Lists user's aims"""
+class GoalChangesApi(APIView):
+    """
+    Lists user's aims and dreams created, updated or deleted since the token.
+    Tokens older than goals.sync.MAX_TOKEN_AGE are answered with 410, the
+    client must sync again without a token.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            QueryParameter(
+                "since", "Token from the previous sync, omit for a full sync"
+            )
+        ],
+        responses={200: GoalChangesSerializer()},
+    )
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = parse_token(since)
+            except (ValueError, OverflowError):
+                raise ValidationError({"since": ["Invalid sync token"]})
+
+        try:
+            changes = get_changes(request.user, since)
+        except TokenExpired:
+            raise FullResyncRequired()
+        context = {"request": request}
+        for key, values_serializer_class in (
+            ("aims", AimValuesSerializer),
+            ("dreams", DreamValuesSerializer),
+        ):
+            serializer = values_serializer_class(context=context)
+            changes[key] = serializer.serialize(serializer.get_values(changes[key]))
+        return Response(changes, status=status.HTTP_200_OK)
+
+
+class GoalStatsApi(APIView):
+    """Returns user's aim and dream stats"""
+
+    @swagger_auto_schema(responses={200: GoalStatsSerializer()})
+    def get(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+        return Response(get_stats(request.user), status=status.HTTP_200_OK)
+
+
+class UserGoalStatsApi(APIView):
+    """Returns aim and dream stats of the inspirer with slug"""
+
+    @swagger_auto_schema(responses={200: GoalStatsSerializer()})
+    def get(self, request, *args, **kwargs):
+        user = get_object_or_404(User, slug=self.kwargs["slug"])
+        if user != request.user and not user.groups.filter(name="inspirer").exists():
+            raise PermissionDenied("Only inspirer's stats are public")
+        return Response(get_stats(user), status=status.HTTP_200_OK)
+
+
+class UserSuggestionsApi(APIView):
+    """
+    Inspirers followed by subscribers of the user with slug, ordered by number
+    of such subscribers. Authors the requester follows are left out.
+    """
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            QueryParameter("limit", f"number of suggestions, up to {MAX_SUGGESTIONS}")
+        ],
+        responses={200: SuggestedUserSerializer(many=True)},
+    )
+    def get(self, request, *args, **kwargs):
+        author = get_object_or_404(User, slug=self.kwargs["slug"])
+        try:
+            limit = int(request.GET.get("limit", 10))
+        except ValueError:
+            raise ValidationError({"limit": "Must be an integer"})
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+        exclude = set()
+        if request.user.is_authenticated:
+            # the graph of this process misses follows made through other ones
+            exclude = set(
+                Subscriber.objects.filter(user=request.user).values_list(
+                    "author_id", flat=True
+                )
+            )
+            exclude.add(request.user.id)
+        suggestions = follow_graph.get().suggest(author.id, limit, exclude)
+
+        users = User.objects.in_bulk([user_id for user_id, count in suggestions])
+        result = []
+        for user_id, count in suggestions:
+            if user_id in users:
+                users[user_id].co_subscribers = count
+                result.append(users[user_id])
+        return Response(
+            SuggestedUserSerializer(result, many=True).data, status=status.HTTP_200_OK
+        )
+
+
+class InspirerProfileApi(APIView):
+    """
+    Returns the public page of the inspirer with slug: profile, recent posts
+    and number of aims, precomputed by user.profiles.
+    """
+
+    @swagger_auto_schema(responses={200: InspirerProfileSerializer()})
+    def get(self, request, *args, **kwargs):
+        document = (
+            InspirerProfile.objects.filter(slug=self.kwargs["slug"])
+            .values_list("document", flat=True)
+            .first()
+        )
+        if document is None:
+            user = get_object_or_404(User, slug=self.kwargs["slug"])
+            # checked before building, so other users' pages never write
+            if user.groups.filter(name="inspirer").exists():
+                document = rebuild_profile(user.id)
+            if document is None:
+                raise NotFound("User is not an inspirer")
+
+        for post in document["recent_posts"]:
+            if post["video"]:
+                post["video"] = request.build_absolute_uri(post["video"])
+        return Response(document, status=status.HTTP_200_OK)
+
+
+class UserAimApi(ArchivedAimsMixin, generics.GenericAPIView, ValuesListModelMixin):
+    """Lists user's active aims"""
 
     serializer_class = AimSerializer
+    values_serializer_class = AimValuesSerializer
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
         return Aim.objects.filter(user__slug=self.kwargs["slug"])
 
+    def get_archived_queryset(self):
+        return ArchivedAim.objects.filter(user__slug=self.kwargs["slug"])
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            QueryParameter("include_archived", "also list archived aims")
+        ]
+    )
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
 
-class PostApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModelMixin):
+class PostApi(generics.GenericAPIView, ValuesListModelMixin, mixins.CreateModelMixin):
     """Lists inspirer's posts and creates new"""
 
     serializer_class = PostSerializer
+    values_serializer_class = PostValuesSerializer
     pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
@@ -309,3 +671,64 @@ class PostApi(generics.GenericAPIView, mixins.ListModelMixin, mixins.CreateModel
         ):
             return self.create(request, *args, **kwargs)
         raise PermissionDenied("You can't create post")
+
+    def perform_create(self, serializer):
+        serializer.save(creator=self.request.user)
+
+
+class NotificationApi(generics.GenericAPIView, mixins.ListModelMixin):
+    """Lists user's unread notifications about new posts, newest first"""
+
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        if not self.request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+        return Notification.objects.filter(
+            user=self.request.user, is_read=False
+        ).select_related("post__creator")
+
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
+class ReadNotificationsApi(APIView):
+    """Marks notifications with given ids as read, or all of them if ids are omitted"""
+
+    @swagger_auto_schema(
+        request_body=ReadNotificationsSerializer(),
+        responses={200: ReadNotificationsResponseSerializer()},
+    )
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            raise AuthenticationFailed("User is not authenticated")
+        serializer = ReadNotificationsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        notifications = Notification.objects.filter(user=request.user, is_read=False)
+        if "ids" in serializer.validated_data:
+            notifications = notifications.filter(
+                id__in=serializer.validated_data["ids"]
+            )
+        updated = notifications.update(is_read=True)
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
+
+
+class BatchApi(APIView):
+    """Runs several api requests in one, authenticating only once"""
+
+    @swagger_auto_schema(
+        request_body=BatchSerializer(), responses={200: BatchResponseSerializer()}
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # authenticate before sub-requests may run in other threads
+        request.user
+        responses = run_batch(
+            request,
+            serializer.validated_data["requests"],
+            serializer.validated_data["parallel"],
+        )
+        return Response({"responses": responses}, status=status.HTTP_200_OK)
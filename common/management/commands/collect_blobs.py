@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import Blob
+from common.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = "Deletes stored blobs that are no longer referenced by any row."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=3600,
+            help="Seconds a blob has to stay unreferenced before it's deleted, "
+            "protects uploads whose rows are not saved yet.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        storage = ContentAddressedStorage()
+        cutoff = timezone.now() - timedelta(seconds=options["grace"])
+        garbage = Blob.objects.filter(references=0, updated_at__lt=cutoff)
+
+        deleted = freed = 0
+        for blob in garbage.iterator():
+            if options["dry_run"]:
+                deleted, freed = deleted + 1, freed + blob.size
+                continue
+            # the storage touches the row before reusing a blob, deleting the
+            # row first makes it wait until the file is gone
+            with transaction.atomic():
+                if garbage.filter(pk=blob.pk).delete()[0]:
+                    storage.delete(blob.name)
+                    deleted, freed = deleted + 1, freed + blob.size
+
+        self.stdout.write(
+            f"{'Would delete' if options['dry_run'] else 'Deleted'} "
+            f"{deleted} blobs, {freed} bytes"
+        )
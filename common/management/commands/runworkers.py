@@ -0,0 +1,102 @@
+import logging
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+
+from common.queue import claim, run
+
+logger = logging.getLogger(__name__)
+
+
+def work(stop, poll_interval, burst):
+    """Runs tasks until stopped, or until the queue is empty in burst mode"""
+    try:
+        while not stop.is_set():
+            try:
+                claimed = claim()
+            except OperationalError:
+                # sqlite is locked by another writer
+                logger.warning("Can't claim a task", exc_info=True)
+                claimed = None
+            if claimed is None:
+                if burst:
+                    return
+                stop.wait(poll_interval)
+                continue
+            try:
+                run(claimed)
+            except Exception:
+                # the result wasn't saved, the task is claimed again once its
+                # lease expires
+                logger.exception("Can't save result of %s", claimed)
+    finally:
+        connections.close_all()
+
+
+def run_pool(threads, poll_interval, burst, stop=None):
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+
+    pool = [
+        threading.Thread(
+            target=work, args=(stop, poll_interval, burst), name=f"worker-{i}"
+        )
+        for i in range(threads)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background tasks from the database queue with a pool of "
+        "processes, each running several threads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=2)
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=1.0,
+            help="Seconds an idle worker waits before checking the queue again.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once there are no due tasks.",
+        )
+
+    def handle(self, *args, **options):
+        pool_args = (options["threads"], options["poll"], options["burst"])
+        if options["processes"] == 1:
+            run_pool(*pool_args)
+            return
+
+        # children must open their own db connections
+        connections.close_all()
+        processes = [
+            multiprocessing.Process(target=run_pool, args=pool_args)
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+
+        def stop(signum, frame):
+            # children finish their current task and exit, see run_pool
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, stop)
+        for process in processes:
+            process.join()
@@ -0,0 +1,186 @@
+"""
+Request metrics in Prometheus text format.
+
+Every process keeps its counters and histograms in memory and writes them
+to its own file in METRICS_DIR every METRICS_FLUSH_INTERVAL seconds. The
+/metrics view sums the files of all processes, so METRICS_DIR should be
+emptied when the service is deployed.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+COUNTERS = {
+    "http_requests_total": "Requests by route, method and status.",
+    "db_queries_total": "Database queries made while serving a route.",
+    "db_query_duration_seconds_total": "Time spent in database queries by route.",
+    "upload_bytes_total": "Bytes of uploaded files by route.",
+}
+HISTOGRAMS = {
+    "http_request_duration_seconds": "Request latency by route and method.",
+}
+
+
+class Registry:
+    """Metrics of this process, keyed by name and sorted label pairs"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.pid = os.getpid()
+        self.counters = {}
+        # [count per bucket..., count of larger values, sum]
+        self.histograms = {}
+        self.flushed_at = time.monotonic()
+        self.dirty = False
+
+    def _check_pid(self):
+        # metrics copied from the parent of a forked worker aren't ours
+        if self.pid != os.getpid():
+            self._reset()
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self._check_pid()
+            self.counters[key] = self.counters.get(key, 0) + value
+            self.dirty = True
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            self._check_pid()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            histogram[bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[-1] += value
+            self.dirty = True
+
+    def dump(self):
+        with self._lock:
+            self._check_pid()
+            return {
+                "counters": [[*key, value] for key, value in self.counters.items()],
+                "histograms": [
+                    [*key, value] for key, value in self.histograms.items()
+                ],
+            }
+
+    @property
+    def path(self):
+        return os.path.join(settings.METRICS_DIR, f"metrics_{os.getpid()}.json")
+
+    def flush(self):
+        self.dirty = False
+        self.flushed_at = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.dump(), f)
+        os.replace(tmp_path, self.path)
+
+    def maybe_flush(self):
+        if (
+            self.dirty
+            and time.monotonic() - self.flushed_at > settings.METRICS_FLUSH_INTERVAL
+        ):
+            self.flush()
+
+
+registry = Registry()
+
+
+@atexit.register
+def _flush_on_exit():
+    if registry.dirty:
+        registry.flush()
+
+
+def _label_pairs(labels):
+    # values are sorted, so a missing one must not be None
+    return tuple((key, str(value)) for key, value in labels)
+
+
+def _collect():
+    """Sums metrics of every process, this one's are taken from memory"""
+    counters, histograms = {}, {}
+    dumps = [registry.dump()]
+    own_file = os.path.basename(registry.path)
+    if os.path.isdir(settings.METRICS_DIR):
+        for name in os.listdir(settings.METRICS_DIR):
+            if not name.endswith(".json") or name == own_file:
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, name)) as f:
+                    dumps.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+    for dump in dumps:
+        for name, labels, value in dump["counters"]:
+            key = (name, _label_pairs(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in dump["histograms"]:
+            key = (name, _label_pairs(labels))
+            if key in histograms:
+                histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+            else:
+                histograms[key] = values
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(name, labels, value, extra=()):
+    pairs = ",".join(f'{key}="{_escape(val)}"' for key, val in (*labels, *extra))
+    return f"{name}{{{pairs}}} {value}" if pairs else f"{name} {value}"
+
+
+def render():
+    counters, histograms = _collect()
+    lines = []
+    for name, description in COUNTERS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for (key_name, labels), value in sorted(counters.items()):
+            if key_name == name:
+                lines.append(_format(name, labels, value))
+
+    for name, description in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for (key_name, labels), values in sorted(histograms.items()):
+            if key_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                cumulative += count
+                lines.append(
+                    _format(f"{name}_bucket", labels, cumulative, [("le", bound)])
+                )
+            total = cumulative + values[-2]
+            lines.append(_format(f"{name}_bucket", labels, total, [("le", "+Inf")]))
+            lines.append(_format(f"{name}_sum", labels, values[-1]))
+            lines.append(_format(f"{name}_count", labels, total))
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4")
@@ -0,0 +1,136 @@
+import hashlib
+import re
+import time
+import zlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from .metrics import registry
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def compress(content):
+    # deterministic gzip: no file name and zero mtime
+    compressor = zlib.compressobj(settings.COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(content) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Gzips responses larger than COMPRESSION_MIN_SIZE for clients accepting it.
+
+    Compressed bodies of cacheable responses are kept in the cache under the
+    digest of the uncompressed body, so a list served to many clients is
+    compressed once.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if not ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            return response
+
+        if self.is_cacheable(request, response):
+            key = f"gzip:{hashlib.sha256(response.content).hexdigest()}"
+            compressed = cache.get(key)
+            if compressed is None:
+                compressed = compress(response.content)
+                cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        else:
+            compressed = compress(response.content)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = "gzip"
+        # the compressed body isn't byte-equal to what a strong etag names
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+    @staticmethod
+    def is_cacheable(request, response):
+        cache_control = response.get("Cache-Control", "")
+        return (
+            request.method in ("GET", "HEAD")
+            and response.status_code == 200
+            and "no-store" not in cache_control
+            and "private" not in cache_control
+        )
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their time"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """
+    Records count and latency of requests, their database queries and
+    uploaded bytes per url name, see common.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        # unnamed patterns, like the media route, are labelled by their pattern
+        route = (("route", (match.url_name or match.route) if match else "unmatched"),)
+        registry.inc(
+            "http_requests_total",
+            (*route, ("method", request.method), ("status", str(response.status_code))),
+        )
+        registry.observe(
+            "http_request_duration_seconds",
+            (*route, ("method", request.method)),
+            duration,
+        )
+        if queries.count:
+            registry.inc("db_queries_total", route, queries.count)
+            registry.inc("db_query_duration_seconds_total", route, queries.duration)
+
+        # only set if the view parsed a multipart body
+        files = request.__dict__.get("_files")
+        if files:
+            uploaded = sum(f.size for _, values in files.lists() for f in values)
+            registry.inc("upload_bytes_total", route, uploaded)
+
+        registry.maybe_flush()
+        return response
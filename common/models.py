@@ -0,0 +1,57 @@
+from django.db import models
+
+
+class Blob(models.Model):
+    """File stored once under its content digest by ContentAddressedStorage"""
+
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [models.Index(fields=["references", "updated_at"])]
+
+
+class Task(models.Model):
+    """Background task run by `manage.py runworkers`, see common.queue"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [(QUEUED, "queued"), (RUNNING, "running"), (FAILED, "failed")]
+
+    name = models.CharField(max_length=255)
+    kwargs = models.JSONField(default=dict)
+    # only one queued task may have the key, so a change made while a task
+    # runs still gets a task of its own
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # seconds a claimed task stays invisible to other workers
+    timeout = models.PositiveIntegerField(default=300)
+    run_at = models.DateTimeField()
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} {self.status}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"]),
+            models.Index(fields=["status", "locked_until"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["dedup_key"],
+                condition=models.Q(status="queued"),
+                name="common_task_unique_dedup_key",
+            )
+        ]
@@ -0,0 +1,146 @@
+"""
+Background tasks stored in the database and run by `manage.py runworkers`.
+
+    @task(max_attempts=3)
+    def send_email(user_id):
+        ...
+
+    send_email.enqueue(user_id=user.id, dedup_key=f"email:{user.id}")
+
+Tasks are inserted once the current transaction commits, keyword arguments
+must be JSON serializable. A claimed task is hidden from other workers for
+its timeout, if the worker dies it's picked up again after that. Failed
+tasks are retried with exponential backoff, finished ones are deleted.
+A task isn't queued again while one with the same dedup key waits to run.
+"""
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+# candidates fetched per claim, several workers rarely race for the same row
+CLAIM_BATCH = 10
+RETRY_DELAY = 10
+MAX_RETRY_DELAY = 3600
+
+logger = logging.getLogger(__name__)
+
+
+def task(
+    max_attempts=5, timeout=300, retry_delay=RETRY_DELAY, max_retry_delay=MAX_RETRY_DELAY
+):
+    """Registers function as a task and adds ``enqueue(dedup_key, delay, **kwargs)``"""
+
+    def decorator(func):
+        func.task_name = f"{func.__module__}.{func.__qualname__}"
+        func.task_options = {
+            "max_attempts": max_attempts,
+            "timeout": timeout,
+            "retry_delay": retry_delay,
+            "max_retry_delay": max_retry_delay,
+        }
+
+        def enqueue(dedup_key=None, delay=0, **kwargs):
+            return enqueue_task(func, kwargs, dedup_key, delay)
+
+        func.enqueue = enqueue
+        return func
+
+    return decorator
+
+
+def enqueue_task(func, kwargs, dedup_key=None, delay=0):
+    def insert():
+        try:
+            with transaction.atomic():
+                Task.objects.create(
+                    name=func.task_name,
+                    kwargs=kwargs,
+                    dedup_key=dedup_key,
+                    max_attempts=func.task_options["max_attempts"],
+                    timeout=func.task_options["timeout"],
+                    run_at=timezone.now() + timedelta(seconds=delay),
+                )
+        except IntegrityError:
+            logger.debug("Task %s with key %s is already queued", func, dedup_key)
+
+    transaction.on_commit(insert)
+
+
+def _claimable(now):
+    return Q(status=Task.QUEUED, run_at__lte=now) | Q(
+        status=Task.RUNNING, locked_until__lte=now
+    )
+
+
+def claim():
+    """
+    Takes a due task, or one whose worker didn't finish it in time. Each row
+    is taken by a conditional update, so two workers never get the same task.
+    """
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(_claimable(now))
+        .order_by("run_at")
+        .values_list("id", "timeout")[:CLAIM_BATCH]
+    )
+    for task_id, timeout in candidates:
+        token = uuid.uuid4().hex
+        claimed = Task.objects.filter(_claimable(now), id=task_id).update(
+            status=Task.RUNNING,
+            locked_by=token,
+            locked_until=now + timedelta(seconds=timeout),
+            attempts=F("attempts") + 1,
+        )
+        if claimed:
+            return Task.objects.get(id=task_id)
+    return None
+
+
+def get_retry_delay(func, attempts):
+    options = getattr(func, "task_options", {})
+    delay = options.get("retry_delay", RETRY_DELAY) * 2 ** (attempts - 1)
+    return min(delay, options.get("max_retry_delay", MAX_RETRY_DELAY))
+
+
+def run(claimed):
+    """Runs a claimed task, then deletes it or schedules a retry"""
+    owned = Task.objects.filter(id=claimed.id, locked_by=claimed.locked_by)
+    func = None
+    try:
+        if claimed.attempts > claimed.max_attempts:
+            raise TimeoutError("Task wasn't finished within its timeout")
+        func = import_string(claimed.name)
+        if not hasattr(func, "task_options"):
+            raise ImportError(f"{claimed.name} is not a task")
+        func(**claimed.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if claimed.attempts >= claimed.max_attempts:
+            logger.error("Task %s failed: %s", claimed, error)
+            owned.update(status=Task.FAILED, last_error=error, locked_until=None)
+        else:
+            logger.warning("Task %s will be retried: %s", claimed, error)
+            delay = get_retry_delay(func, claimed.attempts)
+            try:
+                with transaction.atomic():
+                    owned.update(
+                        status=Task.QUEUED,
+                        last_error=error,
+                        run_at=timezone.now() + timedelta(seconds=delay),
+                        locked_by="",
+                        locked_until=None,
+                    )
+            except IntegrityError:
+                # an equal task was queued meanwhile, it runs instead
+                owned.delete()
+        return False
+    owned.delete()
+    return True
@@ -0,0 +1,112 @@
+"""
+Token buckets shared by all processes of the host.
+
+Buckets are rows of the SQLite file RATE_LIMIT_PATH, so limits hold across
+workers without an external service. A bucket holds up to `capacity` tokens
+and regains `rate` tokens per second. A missing row is a full bucket, rows
+of refilled buckets are removed from time to time.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# seconds between removals of refilled buckets by a process
+CLEANUP_INTERVAL = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    full_at REAL NOT NULL
+)
+"""
+
+
+class Bucket(NamedTuple):
+    key: str
+    capacity: int
+    rate: float
+
+
+class BucketStore:
+    def __init__(self):
+        self._local = threading.local()
+        self.cleaned_at = 0
+
+    def _connect(self):
+        path = settings.RATE_LIMIT_PATH
+        # a forked worker can't use the parent's connection
+        if getattr(self._local, "owner", None) != (os.getpid(), path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            connection = sqlite3.connect(
+                path, timeout=settings.RATE_LIMIT_TIMEOUT, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            # losing recent buckets on a crash only resets some limits
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.owner = (os.getpid(), path)
+        return self._local.connection
+
+    def take(self, buckets):
+        """
+        Takes a token from every bucket, or from none of them if one is
+        empty. Returns None on success, otherwise the empty bucket that
+        refills last and seconds until it has a token.
+        """
+        try:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error:
+            # the limiter being busy mustn't take the service down
+            logger.warning("Rate limit store is unavailable", exc_info=True)
+            return None
+
+        try:
+            return self._take(connection, buckets, time.time())
+        finally:
+            connection.execute("COMMIT")
+
+    def _take(self, connection, buckets, now):
+        rows = {
+            key: (tokens, updated_at)
+            for key, tokens, updated_at in connection.execute(
+                "SELECT key, tokens, updated_at FROM bucket WHERE key IN (%s)"
+                % ",".join("?" * len(buckets)),
+                [bucket.key for bucket in buckets],
+            )
+        }
+        taken = []
+        empty = None
+        for bucket in buckets:
+            tokens, updated_at = rows.get(bucket.key, (bucket.capacity, now))
+            elapsed = max(0, now - updated_at)
+            tokens = min(bucket.capacity, tokens + elapsed * bucket.rate) - 1
+            if tokens < 0:
+                wait = -tokens / bucket.rate
+                if empty is None or wait > empty[1]:
+                    empty = (bucket, wait)
+            full_at = now + (bucket.capacity - tokens) / bucket.rate
+            taken.append((bucket.key, tokens, now, full_at))
+        if empty is not None:
+            return empty
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO bucket VALUES (?, ?, ?, ?)", taken
+        )
+        if now - self.cleaned_at > CLEANUP_INTERVAL:
+            self.cleaned_at = now
+            connection.execute("DELETE FROM bucket WHERE full_at < ?", (now,))
+        return None
+
+
+buckets = BucketStore()
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from django.apps import apps
+from django.db import models
+from django.db.models import F
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_init, post_save, post_delete
+from django.utils import timezone
+
+from .storage import ContentAddressedStorage
+
+
+@lru_cache(maxsize=None)
+def get_blob_fields(model):
+    return tuple(
+        field
+        for field in model._meta.concrete_fields
+        if isinstance(field, models.FileField)
+        and isinstance(field.storage, ContentAddressedStorage)
+    )
+
+
+def get_file_name(value):
+    """Name of a stored file from a model's field value, None if not stored"""
+    if isinstance(value, str):
+        return value or None
+    if isinstance(value, FieldFile) and value._committed:
+        return value.name or None
+    return None
+
+
+def change_references(name, delta):
+    from .models import Blob
+
+    if not name:
+        return
+    blobs = Blob.objects.filter(name=name)
+    if delta < 0:
+        blobs = blobs.filter(references__gte=-delta)
+    blobs.update(references=F("references") + delta, updated_at=timezone.now())
+
+
+def remember_blobs(sender, instance, **kwargs):
+    instance._blob_names = {
+        field.attname: get_file_name(instance.__dict__.get(field.attname))
+        for field in get_blob_fields(sender)
+    }
+
+
+def count_blob_references(sender, instance, **kwargs):
+    old_names = getattr(instance, "_blob_names", {})
+    for field in get_blob_fields(sender):
+        new_name = get_file_name(instance.__dict__.get(field.attname))
+        old_name = old_names.get(field.attname)
+        if new_name != old_name:
+            change_references(new_name, 1)
+            change_references(old_name, -1)
+    remember_blobs(sender, instance)
+
+
+def release_blob_references(sender, instance, **kwargs):
+    for field in get_blob_fields(sender):
+        change_references(get_file_name(instance.__dict__.get(field.attname)), -1)
+
+
+def connect_blob_signals():
+    for model in apps.get_models():
+        if not get_blob_fields(model):
+            continue
+        uid = f"blobs_{model._meta.label_lower}"
+        post_init.connect(remember_blobs, sender=model, dispatch_uid=uid)
+        post_save.connect(count_blob_references, sender=model, dispatch_uid=uid)
+        post_delete.connect(release_blob_references, sender=model, dispatch_uid=uid)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError
+from django.utils import timezone
+
+BLOB_DIRECTORY = "blobs"
+MAX_EXTENSION_LENGTH = 16
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file once under the sha256 digest of its content.
+
+    Uploads are hashed while they are received by common.uploadhandlers, and
+    ones spooled to a temporary file are moved into place instead of copied,
+    so a large upload is written once and never read back. Other files are
+    read once to hash them and again to write them.
+
+    Saved files are registered as Blob rows, rows referencing them are counted
+    by common.signals and unreferenced blobs are removed by collect_blobs.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # the final name is derived from the content in _save
+        return name
+
+    def _digest(self, content):
+        if getattr(content, "sha256", None):
+            return content.sha256
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def _blob_name(self, name, digest):
+        extension = os.path.splitext(name)[1][:MAX_EXTENSION_LENGTH].lower()
+        return f"{BLOB_DIRECTORY}/{digest[:2]}/{digest}{extension}"
+
+    def _register(self, name, size):
+        from common.models import Blob
+
+        # touching the row first waits for a running collect_blobs transaction,
+        # so the file is never checked while it is being removed
+        if not Blob.objects.filter(name=name).update(updated_at=timezone.now()):
+            try:
+                Blob.objects.create(name=name, size=size)
+            except IntegrityError:
+                pass
+
+    def _write(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        if hasattr(content, "temporary_file_path"):
+            try:
+                self._move(content.temporary_file_path(), full_path)
+                return
+            except OSError:
+                # on another file system, copied below
+                pass
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(tmp_path, self.file_permissions_mode)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _move(self, path, full_path):
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        os.replace(path, full_path)
+
+    def _save(self, name, content):
+        name = self._blob_name(name, self._digest(content))
+        self._register(name, content.size)
+        if not self.exists(name):
+            self._write(name, content)
+        return name
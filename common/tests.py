@@ -0,0 +1,218 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+
+from common import queue
+from common.management.commands import runworkers
+from common.metrics import metrics_view
+from common.models import Task
+from common.queue import claim, run, task
+
+calls = []
+
+
+@task()
+def succeeding(value):
+    calls.append(value)
+
+
+@task(max_attempts=3, retry_delay=10)
+def failing():
+    raise ValueError("boom")
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def enqueue(self, func, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            func.enqueue(**kwargs)
+
+    def run_failing(self, claimed):
+        with self.assertLogs("common.queue", "WARNING"):
+            self.assertFalse(run(claimed))
+
+    def make_due(self):
+        Task.objects.update(run_at=timezone.now() - timedelta(seconds=1))
+
+    def test_task_runs_once_and_is_deleted(self):
+        self.enqueue(succeeding, value=1)
+        claimed = claim()
+        self.assertEqual(claimed.status, Task.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(claim())
+
+        self.assertTrue(run(claimed))
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_workers_get_different_tasks(self):
+        self.enqueue(succeeding, value=1)
+        self.enqueue(succeeding, value=2)
+        first, second = claim(), claim()
+        self.assertNotEqual(first.id, second.id)
+        self.assertNotEqual(first.locked_by, second.locked_by)
+        self.assertIsNone(claim())
+
+    def test_task_taken_by_another_worker_is_not_claimed(self):
+        self.enqueue(succeeding, value=1)
+        claimable = queue._claimable
+
+        def race(now):
+            # another worker takes the candidate between the read and update
+            if not race.called:
+                race.called = True
+                return claimable(now)
+            Task.objects.update(
+                status=Task.RUNNING,
+                locked_by="other",
+                locked_until=now + timedelta(seconds=60),
+            )
+            return claimable(now)
+
+        race.called = False
+        with mock.patch.object(queue, "_claimable", race):
+            self.assertIsNone(claim())
+        self.assertEqual(Task.objects.get().locked_by, "other")
+
+    def test_expired_lease_is_reclaimed(self):
+        self.enqueue(succeeding, value=1)
+        stale = claim()
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+
+        reclaimed = claim()
+        self.assertEqual(reclaimed.id, stale.id)
+        self.assertEqual(reclaimed.attempts, 2)
+        self.assertNotEqual(reclaimed.locked_by, stale.locked_by)
+
+        # the first worker doesn't own the task anymore
+        run(stale)
+        self.assertTrue(Task.objects.filter(id=stale.id).exists())
+        self.assertTrue(run(reclaimed))
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_is_retried_with_backoff(self):
+        self.enqueue(failing)
+        for attempt, delay in ((1, 10), (2, 20)):
+            before = timezone.now()
+            self.run_failing(claim())
+            retried = Task.objects.get()
+            self.assertEqual(retried.status, Task.QUEUED)
+            self.assertEqual(retried.attempts, attempt)
+            self.assertIn("ValueError: boom", retried.last_error)
+            self.assertGreaterEqual(retried.run_at, before + timedelta(seconds=delay))
+            self.assertIsNone(claim())
+            self.make_due()
+
+        self.run_failing(claim())
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.FAILED)
+        self.assertEqual(failed.attempts, 3)
+        self.assertIsNone(claim())
+
+    def test_task_over_its_attempts_fails_without_running(self):
+        self.enqueue(succeeding, value=1)
+        Task.objects.update(attempts=Task.objects.get().max_attempts)
+        self.run_failing(claim())
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_duplicate_dedup_key_is_dropped(self):
+        self.enqueue(succeeding, value=1, dedup_key="key")
+        self.enqueue(succeeding, value=2, dedup_key="key")
+        self.assertEqual(Task.objects.get().kwargs, {"value": 1})
+
+    def test_dedup_key_is_queued_again_while_running(self):
+        self.enqueue(succeeding, value=1, dedup_key="key")
+        running = claim()
+        self.enqueue(succeeding, value=2, dedup_key="key")
+        self.assertEqual(Task.objects.count(), 2)
+
+        run(running)
+        self.assertEqual(Task.objects.get().kwargs, {"value": 2})
+
+    def test_retry_is_dropped_for_queued_duplicate(self):
+        self.enqueue(failing, dedup_key="key")
+        running = claim()
+        self.enqueue(failing, dedup_key="key")
+
+        self.run_failing(running)
+        queued = Task.objects.get()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertEqual(queued.attempts, 0)
+
+    def test_worker_survives_database_errors(self):
+        self.enqueue(succeeding, value=1)
+        self.enqueue(succeeding, value=2)
+        results = iter([OperationalError("database is locked")])
+
+        def flaky_run(claimed):
+            for error in results:
+                raise error
+            return run(claimed)
+
+        with mock.patch.object(runworkers, "run", flaky_run):
+            with self.assertLogs(runworkers.logger, "ERROR"):
+                runworkers.work(threading.Event(), 0, burst=True)
+
+        # the other task ran, the failed one waits for its lease to expire
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(Task.objects.get().status, Task.RUNNING)
+
+
+def unnamed_view(request, rest):
+    return HttpResponse()
+
+
+urlpatterns = [
+    path("unnamed/<path:rest>", unnamed_view),
+    path("metrics", metrics_view, name="metrics"),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__, METRICS_TOKEN=None)
+class MetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(METRICS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_unnamed_route_is_labelled_by_its_pattern(self):
+        self.assertEqual(self.client.get("/unnamed/x").status_code, 200)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'http_requests_total{route="unnamed/<path:rest>",method="GET",'
+            'status="200"}',
+            response.content.decode(),
+        )
+
+    def test_labels_of_other_processes_are_sorted(self):
+        # written by a process labelling unnamed routes with null
+        with open(os.path.join(self.directory, "metrics_1.json"), "w") as f:
+            json.dump(
+                {
+                    "counters": [
+                        ["http_requests_total", [["route", None]], 1],
+                        ["http_requests_total", [["route", "metrics"]], 1],
+                    ],
+                    "histograms": [],
+                },
+                f,
+            )
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_requests_total{route="None"} 1', response.content.decode())
@@ -0,0 +1,59 @@
+from django.db import connection, transaction
+
+from user.profiles import schedule_rebuild
+from .models import Aim, ArchivedAim, Tombstone
+
+FIELDS = (
+    "id",
+    "name",
+    "user_id",
+    "description",
+    "created_at",
+    "updated_at",
+    "deadline",
+    "from_dream",
+    "version",
+)
+
+
+def archive_aims(cutoff, batch_size=1000):
+    """
+    Moves aims with deadline before cutoff to ArchivedAim, batch by batch.
+
+    Archived aims still count in goal stats until they are deleted, so rows
+    are moved without post_delete signals. Tombstones are written, so synced
+    clients drop them just like the aims list does by default, and inspirer
+    pages are rebuilt.
+    """
+    archived = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Aim.objects.filter(deadline__lt=cutoff)
+                .order_by("deadline")
+                .values(*FIELDS)[:batch_size]
+            )
+            if not rows:
+                return archived
+            ids = [row["id"] for row in rows]
+            ArchivedAim.objects.bulk_create(ArchivedAim(**row) for row in rows)
+            Tombstone.objects.bulk_create(
+                Tombstone(
+                    kind=Tombstone.AIM, object_id=row["id"], user_id=row["user_id"]
+                )
+                for row in rows
+            )
+            # nothing references aims, so they are deleted without the
+            # collector and its signals
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM %s WHERE id IN (%s)"
+                    % (
+                        connection.ops.quote_name(Aim._meta.db_table),
+                        ", ".join(["%s"] * len(ids)),
+                    ),
+                    ids,
+                )
+        for user_id in {row["user_id"] for row in rows}:
+            schedule_rebuild(user_id)
+        archived += len(rows)
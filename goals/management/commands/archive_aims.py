@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from goals.archive import archive_aims
+
+
+class Command(BaseCommand):
+    help = "Moves aims whose deadline passed long ago to the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Archive aims with deadline more than this many days ago.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archived = archive_aims(cutoff, options["batch_size"])
+        self.stdout.write(f"Archived {archived} aims with deadline before {cutoff}")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from goals.sync import MAX_TOKEN_AGE, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes records of deleted goals older than the oldest accepted "
+        "sync token, and the ones of deleted users."
+    )
+
+    def handle(self, *args, **options):
+        pruned = prune_tombstones()
+        self.stdout.write(
+            f"Pruned {pruned} tombstones older than {MAX_TOKEN_AGE.days} days"
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from goals.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes goal stats rollups from aims and dreams."
+
+    def handle(self, *args, **options):
+        users = rebuild_stats()
+        self.stdout.write(f"Rebuilt goal stats of {users} users")
@@ -0,0 +1,57 @@
+# Generated by Django 4.0.6 on 2026-10-19 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('goals', '0003_sync_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aim',
+            name='from_dream',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='GoalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aims', models.PositiveIntegerField(default=0)),
+                ('dreams', models.PositiveIntegerField(default=0)),
+                ('dreams_converted', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='goal_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='WeeklyGoalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week', models.DateField()),
+                ('aims_created', models.PositiveIntegerField(default=0)),
+                ('dreams_created', models.PositiveIntegerField(default=0)),
+                ('dreams_converted', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'week')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AimDeadlineStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deadline', models.DateField()),
+                ('aims', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'deadline')},
+            },
+        ),
+    ]
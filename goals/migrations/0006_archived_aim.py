@@ -0,0 +1,42 @@
+# Generated by Django 4.0.6 on 2026-10-19 13:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('goals', '0005_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAim',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('deadline', models.DateTimeField()),
+                ('from_dream', models.BooleanField(default=False)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='aim',
+            index=models.Index(fields=['deadline'], name='goals_aim_deadlin_233d0f_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedaim',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_aims', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='archivedaim',
+            index=models.Index(fields=['user', 'deadline'], name='goals_archi_user_id_5be68a_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.6 on 2026-10-19 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_archived_aim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aim',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='archivedaim',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='dream',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -1,4 +1,12 @@
 from django.db import models
+from django.utils import timezone
+from django.dispatch import Signal
+
+# sent by Dream.dream_to_aim with the dream and the created aim
+dream_converted = Signal()
+# sent when an aim's deadline is changed without saving the instance, with
+# user_id, old_deadline and deadline
+aim_deadline_changed = Signal()
 
 
 class Aim(models.Model):
@@ -6,21 +14,59 @@ class Aim(models.Model):
     user = models.ForeignKey("user.User", on_delete=models.CASCADE)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     deadline = models.DateTimeField(blank=False)
+    from_dream = models.BooleanField(default=False)
+    # incremented on every change, clients send it back in If-Match
+    version = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "updated_at"]),
+            models.Index(fields=["deadline"]),
+        ]
+
+
+class ArchivedAim(models.Model):
+    """Aim long past its deadline, moved here by goals.archive with its id"""
+
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        "user.User", on_delete=models.CASCADE, related_name="archived_aims"
+    )
+    description = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    deadline = models.DateTimeField()
+    from_dream = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deadline"])]
+
 
 class Dream(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey("user.User", on_delete=models.CASCADE)
     description = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    version = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "updated_at"])]
+
     def dream_to_aim(self, deadline):
         aim = Aim.objects.create(
             name=self.name,
@@ -28,11 +74,80 @@ class Dream(models.Model):
             description=self.description,
             created_at=self.created_at,
             deadline=deadline,
+            from_dream=True,
         )
         self.delete()
+        dream_converted.send(sender=Dream, dream=self, aim=aim)
         return aim
 
 
+class Tombstone(models.Model):
+    """Records deleted aims and dreams for delta sync"""
+
+    AIM = "aim"
+    DREAM = "dream"
+    KIND_CHOICES = [(AIM, "Aim"), (DREAM, "Dream")]
+
+    kind = models.CharField(max_length=5, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # no db constraint: tombstones of a deleted user's goals are written while
+    # the user row itself is being deleted
+    user = models.ForeignKey(
+        "user.User", on_delete=models.CASCADE, db_constraint=False, related_name="+"
+    )
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "deleted_at"])]
+
+
+class GoalStats(models.Model):
+    """Per user goal counters, maintained by goals.signals"""
+
+    user = models.OneToOneField(
+        "user.User", on_delete=models.CASCADE, related_name="goal_stats"
+    )
+    aims = models.PositiveIntegerField(default=0)
+    dreams = models.PositiveIntegerField(default=0)
+    dreams_converted = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} goal stats"
+
+
+class AimDeadlineStats(models.Model):
+    """Number of user's aims due on a day, overdue aims are summed from these"""
+
+    user = models.ForeignKey("user.User", on_delete=models.CASCADE, related_name="+")
+    deadline = models.DateField()
+    aims = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} {self.deadline}"
+
+    class Meta:
+        unique_together = ("user", "deadline")
+
+
+class WeeklyGoalStats(models.Model):
+    """Goals created and converted by a user during the week starting on monday"""
+
+    user = models.ForeignKey("user.User", on_delete=models.CASCADE, related_name="+")
+    week = models.DateField()
+    aims_created = models.PositiveIntegerField(default=0)
+    dreams_created = models.PositiveIntegerField(default=0)
+    dreams_converted = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user} {self.week}"
+
+    class Meta:
+        unique_together = ("user", "week")
+
+
 class Note(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey("user.User", on_delete=models.CASCADE)
@@ -55,3 +170,26 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+
+
+class Notification(models.Model):
+    """New post of an author the user is subscribed to, see goals.notifications"""
+
+    user = models.ForeignKey(
+        "user.User", on_delete=models.CASCADE, related_name="notifications"
+    )
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    created_at = models.DateTimeField(default=timezone.now)
+    is_read = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.user} {self.post}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["user", "created_at"],
+                condition=models.Q(is_read=False),
+                name="goals_notification_unread",
+            )
+        ]
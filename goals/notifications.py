@@ -0,0 +1,52 @@
+from django.db import transaction
+from django.db.models import Max
+
+from common.queue import task
+from user.models import Subscriber
+from .models import Notification, Post
+
+CHUNK_SIZE = 1000
+
+
+@task(timeout=600)
+def fan_out(post_id):
+    """
+    Writes a notification about the post for every subscriber of its author,
+    subscribers are read and notifications inserted in chunks. A retried
+    fan-out continues after the last notified subscriber.
+    """
+    post = Post.objects.filter(id=post_id).values("creator_id", "created_at").first()
+    if post is None:
+        return 0
+
+    last_user_id = (
+        Notification.objects.filter(post_id=post_id).aggregate(
+            last=Max("user_id")
+        )["last"]
+        or 0
+    )
+    notified = 0
+    while True:
+        user_ids = list(
+            Subscriber.objects.filter(
+                author_id=post["creator_id"], user_id__gt=last_user_id
+            )
+            .order_by("user_id")
+            .values_list("user_id", flat=True)[:CHUNK_SIZE]
+        )
+        if not user_ids:
+            return notified
+        with transaction.atomic():
+            Notification.objects.bulk_create(
+                Notification(
+                    user_id=user_id, post_id=post_id, created_at=post["created_at"]
+                )
+                for user_id in user_ids
+            )
+        notified += len(user_ids)
+        last_user_id = user_ids[-1]
+
+
+def schedule_fan_out(post):
+    """Queues notifying subscribers once the post is committed"""
+    fan_out.enqueue(post_id=post.id, dedup_key=f"post-notifications:{post.id}")
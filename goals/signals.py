@@ -0,0 +1,112 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import (
+    Aim,
+    ArchivedAim,
+    Dream,
+    Tombstone,
+    Post,
+    GoalStats,
+    AimDeadlineStats,
+    WeeklyGoalStats,
+    dream_converted,
+    aim_deadline_changed,
+)
+from .notifications import schedule_fan_out
+from .stats import bump, local_date, week_start
+
+
+@receiver(post_delete, sender=Aim)
+def delete_aim(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind=Tombstone.AIM, object_id=instance.id, user_id=instance.user_id
+    )
+
+
+@receiver(post_delete, sender=Dream)
+def delete_dream(sender, instance, **kwargs):
+    Tombstone.objects.create(
+        kind=Tombstone.DREAM, object_id=instance.id, user_id=instance.user_id
+    )
+
+
+@receiver(post_init, sender=Aim)
+def remember_aim_deadline(sender, instance, **kwargs):
+    instance._stats_deadline = instance.__dict__.get("deadline")
+
+
+@receiver(post_save, sender=Aim)
+def count_aim(sender, instance, created, **kwargs):
+    user = {"user_id": instance.user_id}
+    deadline = local_date(instance.deadline)
+    if created:
+        bump(GoalStats, user, aims=1)
+        if not instance.from_dream:
+            bump(
+                WeeklyGoalStats,
+                {**user, "week": week_start(instance.created_at)},
+                aims_created=1,
+            )
+        bump(AimDeadlineStats, {**user, "deadline": deadline}, aims=1)
+    elif instance._stats_deadline is not None:
+        old_deadline = local_date(instance._stats_deadline)
+        if old_deadline != deadline:
+            bump(AimDeadlineStats, {**user, "deadline": old_deadline}, aims=-1)
+            bump(AimDeadlineStats, {**user, "deadline": deadline}, aims=1)
+    instance._stats_deadline = instance.deadline
+
+
+@receiver(aim_deadline_changed, sender=Aim)
+def move_aim_deadline(sender, user_id, old_deadline, deadline, **kwargs):
+    user = {"user_id": user_id}
+    old_deadline, deadline = local_date(old_deadline), local_date(deadline)
+    if old_deadline != deadline:
+        bump(AimDeadlineStats, {**user, "deadline": old_deadline}, aims=-1)
+        bump(AimDeadlineStats, {**user, "deadline": deadline}, aims=1)
+
+
+@receiver(post_delete, sender=Aim)
+@receiver(post_delete, sender=ArchivedAim)
+def uncount_aim(sender, instance, **kwargs):
+    user = {"user_id": instance.user_id}
+    bump(GoalStats, user, aims=-1)
+    bump(
+        AimDeadlineStats,
+        {**user, "deadline": local_date(instance.deadline)},
+        aims=-1,
+    )
+
+
+@receiver(post_save, sender=Dream)
+def count_dream(sender, instance, created, **kwargs):
+    if created:
+        user = {"user_id": instance.user_id}
+        bump(GoalStats, user, dreams=1)
+        bump(
+            WeeklyGoalStats,
+            {**user, "week": week_start(instance.created_at)},
+            dreams_created=1,
+        )
+
+
+@receiver(post_delete, sender=Dream)
+def uncount_dream(sender, instance, **kwargs):
+    bump(GoalStats, {"user_id": instance.user_id}, dreams=-1)
+
+
+@receiver(dream_converted, sender=Dream)
+def count_converted_dream(sender, dream, aim, **kwargs):
+    user = {"user_id": aim.user_id}
+    bump(GoalStats, user, dreams_converted=1)
+    bump(
+        WeeklyGoalStats,
+        {**user, "week": week_start(aim.created_at)},
+        dreams_converted=1,
+    )
+
+
+@receiver(post_save, sender=Post)
+def notify_subscribers(sender, instance, created, **kwargs):
+    if created:
+        schedule_fan_out(instance)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from .models import (
+    Aim,
+    ArchivedAim,
+    Dream,
+    GoalStats,
+    AimDeadlineStats,
+    WeeklyGoalStats,
+)
+
+
+def local_date(value):
+    if timezone.is_aware(value):
+        return timezone.localdate(value)
+    return value.date()
+
+
+def week_start(value):
+    day = local_date(value)
+    return day - timedelta(days=day.weekday())
+
+
+def bump(model, keys, **deltas):
+    """
+    Adds deltas to counters of the row with given keys, creating it if needed.
+    Counters never go below zero.
+    """
+    rows = model.objects.filter(**keys)
+    for field, delta in deltas.items():
+        if delta < 0:
+            rows = rows.filter(**{f"{field}__gte": -delta})
+    if rows.update(**{field: F(field) + delta for field, delta in deltas.items()}):
+        return
+    if any(delta < 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        # created concurrently
+        model.objects.filter(**keys).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+
+def get_stats(user):
+    """
+    Reads user's goal stats from the rollup tables. Aims are overdue once the
+    day of their deadline has passed.
+    """
+    today = timezone.localdate()
+    totals = GoalStats.objects.filter(user=user).first() or GoalStats(user=user)
+    overdue = AimDeadlineStats.objects.filter(
+        user=user, deadline__lt=today
+    ).aggregate(aims=Sum("aims"))["aims"]
+    week = (
+        WeeklyGoalStats.objects.filter(user=user, week=week_start(timezone.now()))
+        .values("aims_created", "dreams_created", "dreams_converted")
+        .first()
+    )
+    return {
+        "aims": totals.aims,
+        "overdue_aims": overdue or 0,
+        "dreams": totals.dreams,
+        "dreams_converted": totals.dreams_converted,
+        "this_week": week
+        or {"aims_created": 0, "dreams_created": 0, "dreams_converted": 0},
+    }
+
+
+def _count_by(queryset, *fields):
+    return queryset.values(*fields).annotate(count=Count("id")).order_by()
+
+
+def rebuild_stats():
+    """
+    Recomputes all rollup tables from aims, archived ones included, and
+    dreams. Activity of deleted goals can't be recovered, so weekly numbers
+    only count existing ones.
+    """
+    totals = {}
+
+    def total(user_id):
+        return totals.setdefault(user_id, GoalStats(user_id=user_id))
+
+    for aims in (Aim.objects, ArchivedAim.objects):
+        for row in _count_by(aims, "user"):
+            total(row["user"]).aims += row["count"]
+        for row in _count_by(aims.filter(from_dream=True), "user"):
+            total(row["user"]).dreams_converted += row["count"]
+    for row in _count_by(Dream.objects, "user"):
+        total(row["user"]).dreams = row["count"]
+
+    deadlines = {}
+    for aims in (Aim.objects, ArchivedAim.objects):
+        for row in _count_by(aims.annotate(day=TruncDate("deadline")), "user", "day"):
+            key = (row["user"], row["day"])
+            if key not in deadlines:
+                deadlines[key] = AimDeadlineStats(user_id=key[0], deadline=key[1])
+            deadlines[key].aims += row["count"]
+
+    weeks = {}
+    for field, queryset in (
+        ("aims_created", Aim.objects.filter(from_dream=False)),
+        ("aims_created", ArchivedAim.objects.filter(from_dream=False)),
+        ("dreams_converted", Aim.objects.filter(from_dream=True)),
+        ("dreams_converted", ArchivedAim.objects.filter(from_dream=True)),
+        ("dreams_created", Dream.objects.all()),
+    ):
+        queryset = queryset.annotate(week=TruncWeek("created_at"))
+        for row in _count_by(queryset, "user", "week"):
+            key = (row["user"], local_date(row["week"]))
+            if key not in weeks:
+                weeks[key] = WeeklyGoalStats(user_id=key[0], week=key[1])
+            setattr(weeks[key], field, getattr(weeks[key], field) + row["count"])
+
+    with transaction.atomic():
+        GoalStats.objects.all().delete()
+        AimDeadlineStats.objects.all().delete()
+        WeeklyGoalStats.objects.all().delete()
+        GoalStats.objects.bulk_create(totals.values(), batch_size=1000)
+        AimDeadlineStats.objects.bulk_create(deadlines.values(), batch_size=1000)
+        WeeklyGoalStats.objects.bulk_create(weeks.values(), batch_size=1000)
+    return len(totals)
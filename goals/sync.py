@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.utils import timezone
+
+from user.models import User
+from .models import Aim, Dream, Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+# changes are stamped before their transaction commits, so tokens lag behind
+# to cover writes that were in flight during the sync
+TOKEN_OVERLAP = timedelta(seconds=10)
+# tombstones are kept this long, older tokens require a full sync
+MAX_TOKEN_AGE = timedelta(days=30)
+
+
+class TokenExpired(Exception):
+    """The token is older than the tombstones, deletions may be missed"""
+
+
+def make_token(moment: datetime) -> str:
+    """
+    Encode a moment as an opaque sync token.
+    """
+    return str((moment - EPOCH) // MICROSECOND)
+
+
+def parse_token(token: str) -> datetime:
+    """
+    Decode a sync token, raises ValueError on malformed tokens.
+    """
+    value = int(token)
+    if value < 0:
+        raise ValueError("Sync token can't be negative")
+    return EPOCH + value * MICROSECOND
+
+
+def get_changes(user, since=None):
+    """
+    Returns aims and dreams changed since the moment, ids of deleted ones and
+    the token for the next sync. Without `since` everything is returned.
+
+    The token is issued TOKEN_OVERLAP before now, so recent changes are
+    returned again on the next sync and clients must apply them idempotently.
+    Raises TokenExpired for tokens older than MAX_TOKEN_AGE.
+    """
+    now = timezone.now()
+    if since is not None and since < now - MAX_TOKEN_AGE:
+        raise TokenExpired()
+    token = make_token(now - TOKEN_OVERLAP)
+    aims = Aim.objects.filter(user=user)
+    dreams = Dream.objects.filter(user=user)
+    deleted_aims, deleted_dreams = [], []
+
+    if since is not None:
+        aims = aims.filter(updated_at__gte=since)
+        dreams = dreams.filter(updated_at__gte=since)
+        tombstones = Tombstone.objects.filter(
+            user=user, deleted_at__gte=since
+        ).values_list("kind", "object_id")
+        for kind, object_id in tombstones:
+            if kind == Tombstone.AIM:
+                deleted_aims.append(object_id)
+            else:
+                deleted_dreams.append(object_id)
+
+    return {
+        "token": token,
+        "aims": aims,
+        "dreams": dreams,
+        "deleted_aims": deleted_aims,
+        "deleted_dreams": deleted_dreams,
+    }
+
+
+def prune_tombstones(max_age=MAX_TOKEN_AGE):
+    """
+    Deletes tombstones no valid token can ask for and the ones of deleted
+    users, returns the number of deleted rows.
+    """
+    expired = Tombstone.objects.filter(deleted_at__lt=timezone.now() - max_age)
+    orphaned = Tombstone.objects.exclude(user_id__in=User.objects.values("id"))
+    return expired.delete()[0] + orphaned.delete()[0]
@@ -1,3 +1,66 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from goals.models import Aim, Tombstone
+from goals.sync import MAX_TOKEN_AGE, make_token, prune_tombstones
+from user.models import User
+
+
+def make_user(email):
+    return User.objects.create(email=email, first_name="F", last_name="L")
+
+
+class SyncTests(APITestCase):
+    def setUp(self):
+        self.user = make_user("owner@example.com")
+        self.client.force_authenticate(self.user)
+
+    def delete_aim(self, name, days_ago=0):
+        aim = Aim.objects.create(
+            user=self.user,
+            name=name,
+            description="description",
+            deadline=timezone.now() + timedelta(days=30),
+        )
+        aim_id = aim.id
+        aim.delete()
+        Tombstone.objects.filter(object_id=aim_id).update(
+            deleted_at=timezone.now() - timedelta(days=days_ago)
+        )
+        return aim_id
+
+    def sync(self, moment):
+        return self.client.get("/api/goals/changes/", {"since": make_token(moment)})
+
+    def test_old_token_requires_full_resync(self):
+        recent = self.delete_aim("recent")
+        response = self.sync(timezone.now() - MAX_TOKEN_AGE + timedelta(hours=1))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted_aims"], [recent])
+
+        response = self.sync(timezone.now() - MAX_TOKEN_AGE - timedelta(hours=1))
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data["detail"].code, "full_resync_required")
+
+        response = self.client.get("/api/goals/changes/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_expired_and_orphaned_tombstones_are_pruned(self):
+        recent = self.delete_aim("recent")
+        self.delete_aim("expired", days_ago=MAX_TOKEN_AGE.days + 1)
+        other = make_user("other@example.com")
+        Aim.objects.create(
+            user=other, name="aim", description="", deadline=timezone.now()
+        )
+        other_id = other.id
+        # the aim's tombstone is written after the user's ones were collected
+        other.delete()
+        self.assertEqual(Tombstone.objects.filter(user_id=other_id).count(), 1)
+
+        self.assertEqual(prune_tombstones(), 2)
+        self.assertEqual(
+            list(Tombstone.objects.values_list("object_id", flat=True)), [recent]
+        )
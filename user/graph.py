@@ -0,0 +1,273 @@
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+
+from django.conf import settings
+
+from common.queue import task
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"FGRAPH1\n"
+# followers of an author scanned for suggestions, larger audiences are sampled
+MAX_SCANNED_FOLLOWERS = 5000
+# how often workers check whether the snapshot file was rebuilt
+RELOAD_INTERVAL = 30
+# older changes are picked up by the next rebuild
+MAX_PENDING_CHANGES = 10000
+# seconds between snapshot rebuilds by background workers
+REFRESH_INTERVAL = 600
+REFRESH_DEDUP_KEY = "follow-graph:refresh"
+
+
+class Adjacency:
+    """
+    Compressed sparse rows: neighbours of nodes[i] are
+    edges[offsets[i]:offsets[i + 1]], nodes are sorted ids.
+    """
+
+    def __init__(self, nodes=None, offsets=None, edges=None):
+        self.nodes = nodes if nodes is not None else array("q")
+        self.offsets = offsets if offsets is not None else array("q", [0])
+        self.edges = edges if edges is not None else array("q")
+
+    @classmethod
+    def from_sorted_pairs(cls, pairs):
+        """Builds rows from (node, neighbour) pairs sorted by node"""
+        adjacency = cls()
+        nodes, offsets, edges = adjacency.nodes, adjacency.offsets, adjacency.edges
+        for node, neighbour in pairs:
+            if not nodes or nodes[-1] != node:
+                if nodes:
+                    offsets.append(len(edges))
+                nodes.append(node)
+            edges.append(neighbour)
+        if nodes:
+            offsets.append(len(edges))
+        return adjacency
+
+    def neighbours(self, node):
+        i = bisect_left(self.nodes, node)
+        if i == len(self.nodes) or self.nodes[i] != node:
+            return self.edges[0:0]
+        return self.edges[self.offsets[i] : self.offsets[i + 1]]
+
+    def write(self, f):
+        f.write(struct.pack("<qq", len(self.nodes), len(self.edges)))
+        self.nodes.tofile(f)
+        self.offsets.tofile(f)
+        self.edges.tofile(f)
+
+    @classmethod
+    def read(cls, f):
+        node_count, edge_count = struct.unpack("<qq", f.read(16))
+        adjacency = cls(array("q"), array("q"), array("q"))
+        adjacency.nodes.fromfile(f, node_count)
+        adjacency.offsets.fromfile(f, node_count + 1)
+        adjacency.edges.fromfile(f, edge_count)
+        return adjacency
+
+
+class FollowGraph:
+    """
+    Subscriber edges in both directions, followers of every author and
+    authors followed by every user. Changes made after the graph was built are
+    kept in a small overlay until the next rebuild.
+    """
+
+    def __init__(self, followers, followees, built_at):
+        self.followers = followers
+        self.followees = followees
+        self.built_at = built_at
+        # author_id -> {user_id: (subscribed, changed at)} and the other way round
+        self.follower_changes = {}
+        self.followee_changes = {}
+
+    @classmethod
+    def build(cls):
+        from .models import Subscriber
+
+        built_at = time.time()
+        edges = Subscriber.objects.values_list("author_id", "user_id")
+        followers = Adjacency.from_sorted_pairs(
+            edges.order_by("author_id", "user_id").iterator(chunk_size=10000)
+        )
+        followees = Adjacency.from_sorted_pairs(
+            (user_id, author_id)
+            for author_id, user_id in edges.order_by("user_id", "author_id").iterator(
+                chunk_size=10000
+            )
+        )
+        return cls(followers, followees, built_at)
+
+    @classmethod
+    def empty(cls):
+        return cls(Adjacency(), Adjacency(), 0)
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<d", self.built_at))
+            self.followers.write(f)
+            self.followees.write(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a follow graph")
+            (built_at,) = struct.unpack("<d", f.read(8))
+            followers = Adjacency.read(f)
+            followees = Adjacency.read(f)
+        return cls(followers, followees, built_at)
+
+    def set_edge(self, author_id, user_id, subscribed, changed_at=None):
+        change = (subscribed, changed_at or time.time())
+        self.follower_changes.setdefault(author_id, {})[user_id] = change
+        self.followee_changes.setdefault(user_id, {})[author_id] = change
+
+    def keep_changes_since(self, changes):
+        """Applies (author_id, user_id, subscribed, changed at) made after the build"""
+        for author_id, user_id, subscribed, changed_at in changes:
+            if changed_at >= self.built_at:
+                self.set_edge(author_id, user_id, subscribed, changed_at)
+
+    def get_changes(self):
+        return [
+            (author_id, user_id, subscribed, changed_at)
+            for author_id, changes in self.follower_changes.items()
+            for user_id, (subscribed, changed_at) in changes.items()
+        ]
+
+    @staticmethod
+    def _with_changes(base, changes):
+        if not changes:
+            return base
+        result = set(base)
+        for node, (subscribed, changed_at) in changes.items():
+            if subscribed:
+                result.add(node)
+            else:
+                result.discard(node)
+        return result
+
+    def get_followers(self, author_id):
+        return self._with_changes(
+            self.followers.neighbours(author_id), self.follower_changes.get(author_id)
+        )
+
+    def get_followees(self, user_id):
+        return self._with_changes(
+            self.followees.neighbours(user_id), self.followee_changes.get(user_id)
+        )
+
+    def suggest(self, author_id, limit, exclude=()):
+        """
+        Top authors followed by followers of the author, as (id, count) pairs.
+        """
+        followers = list(self.get_followers(author_id))
+        step = max(1, len(followers) // MAX_SCANNED_FOLLOWERS)
+
+        counts = Counter()
+        for user_id in followers[::step]:
+            counts.update(self.get_followees(user_id))
+        counts.pop(author_id, None)
+        for excluded in exclude:
+            counts.pop(excluded, None)
+        return counts.most_common(limit)
+
+
+class FollowGraphStore:
+    """
+    Per process follow graph, loaded from the snapshot written by
+    `manage.py rebuild_follow_graph` and refresh_snapshot. Until the snapshot
+    exists the graph holds only follows made through this process, it isn't
+    built from the database during a request.
+    """
+
+    def __init__(self):
+        self._graph = None
+        self._mtime = None
+        self._checked_at = 0
+        # changes made before the graph was loaded
+        self._pending = deque(maxlen=MAX_PENDING_CHANGES)
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return settings.FOLLOW_GRAPH_PATH
+
+    def _snapshot_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def get(self):
+        now = time.monotonic()
+        if self._graph is not None and now - self._checked_at < RELOAD_INTERVAL:
+            return self._graph
+
+        with self._lock:
+            self._checked_at = now
+            mtime = self._snapshot_mtime()
+            if self._graph is not None and mtime == self._mtime:
+                return self._graph
+
+            if mtime:
+                graph = FollowGraph.load(self.path)
+            else:
+                logger.warning("No follow graph snapshot at %s", self.path)
+                schedule_refresh(delay=0)
+                graph = FollowGraph.empty()
+            if self._graph is not None:
+                graph.keep_changes_since(self._graph.get_changes())
+            graph.keep_changes_since(self._pending)
+            self._graph, self._mtime = graph, mtime
+            self._pending.clear()
+        return self._graph
+
+    def set_edge(self, author_id, user_id, subscribed):
+        with self._lock:
+            if self._graph is None:
+                self._pending.append((author_id, user_id, subscribed, time.time()))
+            else:
+                self._graph.set_edge(author_id, user_id, subscribed)
+
+    def subscribe(self, author_id, user_id):
+        self.set_edge(author_id, user_id, True)
+
+    def unsubscribe(self, author_id, user_id):
+        self.set_edge(author_id, user_id, False)
+
+    def rebuild(self):
+        graph = FollowGraph.build()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        graph.save(self.path)
+        return graph
+
+
+follow_graph = FollowGraphStore()
+
+
+def schedule_refresh(delay=REFRESH_INTERVAL):
+    refresh_snapshot.enqueue(dedup_key=REFRESH_DEDUP_KEY, delay=delay)
+
+
+@task(timeout=600)
+def refresh_snapshot():
+    """
+    Rebuilds the snapshot and queues the next rebuild, workers reload it once
+    its mtime changes.
+    """
+    try:
+        follow_graph.rebuild()
+    finally:
+        schedule_refresh()
@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from common.generators import generate_charset
+from .models import User
+
+FIELDS = ("email", "first_name", "last_name")
+SLUG_LENGTH = 20
+
+
+def read_rows(path):
+    """Yields (line number, row) of a CSV file with a header or of a JSONL file"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, e
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def clean_row(row):
+    """Validates row fields like the model does, password is optional"""
+    if isinstance(row, Exception):
+        raise ValidationError(f"Invalid JSON: {row}")
+    if not isinstance(row, dict):
+        raise ValidationError("Row must be an object")
+    values = {}
+    for name in FIELDS:
+        value = row.get(name)
+        value = "" if value is None else str(value).strip()
+        values[name] = User._meta.get_field(name).clean(value, None)
+    values["password"] = row.get("password") or None
+    return values
+
+
+def init_worker():
+    django.setup()
+
+
+def hash_password(password):
+    # users without a password get an unusable one
+    return make_password(password)
+
+
+def generate_slugs(count):
+    """Returns count slugs not used by any user"""
+    slugs = set()
+    while len(slugs) < count:
+        candidates = {generate_charset(SLUG_LENGTH) for _ in range(count - len(slugs))}
+        candidates -= set(
+            User.objects.filter(slug__in=candidates).values_list("slug", flat=True)
+        )
+        slugs |= candidates
+    return list(slugs)
+
+
+class UserImporter:
+    """
+    Creates users from a file in batches, without the per user signals.
+    Progress is saved after every batch, so an interrupted import continues
+    after the last imported line. Rows that can't be imported are appended
+    to the error report with their line number.
+    """
+
+    def __init__(self, path, batch_size=1000, processes=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.processes = processes or os.cpu_count()
+        self.progress_path = f"{path}.progress"
+        self.errors_path = f"{path}.errors.csv"
+        self.emails = set()
+        self.imported = self.failed = 0
+
+    def get_progress(self):
+        try:
+            with open(self.progress_path) as f:
+                return int(f.read())
+        except FileNotFoundError:
+            return 0
+
+    def save_progress(self, line):
+        tmp_path = f"{self.progress_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(line))
+        os.replace(tmp_path, self.progress_path)
+
+    def reset(self):
+        for path in (self.progress_path, self.errors_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def report(self, number, row, error):
+        email = row.get("email", "") if isinstance(row, dict) else ""
+        self.errors.writerow([number, email, error])
+        self.failed += 1
+
+    def run(self):
+        done = self.get_progress()
+        pool = ProcessPoolExecutor(self.processes, initializer=init_worker)
+        with pool, open(self.errors_path, "a", newline="") as errors_file:
+            self.pool = pool
+            self.errors = csv.writer(errors_file)
+            if not errors_file.tell():
+                self.errors.writerow(["line", "email", "error"])
+
+            batch = []
+            for number, row in read_rows(self.path):
+                if number <= done:
+                    continue
+                batch.append((number, row))
+                if len(batch) == self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        return self.imported, self.failed
+
+    def import_batch(self, batch):
+        rows = []
+        for number, row in batch:
+            try:
+                values = clean_row(row)
+            except ValidationError as e:
+                self.report(number, row, "; ".join(e.messages))
+                continue
+            if values["email"] in self.emails:
+                self.report(number, row, "Email is repeated in the file")
+                continue
+            self.emails.add(values["email"])
+            rows.append((number, row, values))
+
+        existing = set(
+            User.objects.filter(
+                email__in=[values["email"] for _, _, values in rows]
+            ).values_list("email", flat=True)
+        )
+        for number, row, values in rows:
+            if values["email"] in existing:
+                self.report(number, row, "User with this email already exists")
+        rows = [row for row in rows if row[2]["email"] not in existing]
+
+        passwords = self.pool.map(
+            hash_password,
+            [values.pop("password") for _, _, values in rows],
+            chunksize=max(1, len(rows) // (self.processes * 4)),
+        )
+        users = [
+            User(username=values["email"], slug=slug, password=password, **values)
+            for (_, _, values), slug, password in zip(
+                rows, generate_slugs(len(rows)), passwords
+            )
+        ]
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+            self.imported += len(users)
+        except IntegrityError:
+            # registered concurrently, find the conflicting rows
+            for (number, row, _), user in zip(rows, users):
+                try:
+                    with transaction.atomic():
+                        User.objects.bulk_create([user])
+                    self.imported += 1
+                except IntegrityError as e:
+                    self.report(number, row, str(e))
+        self.save_progress(batch[-1][0])
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.importing import UserImporter
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates users from a CSV (with a header) or JSONL file with email, "
+        "first_name, last_name and optional password. An interrupted import "
+        "continues where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Password hashing processes, number of CPUs by default.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Forget saved progress and the error report.",
+        )
+
+    def handle(self, *args, **options):
+        importer = UserImporter(
+            options["path"], options["batch_size"], options["processes"]
+        )
+        if options["restart"]:
+            importer.reset()
+        start = time.perf_counter()
+        try:
+            imported, failed = importer.run()
+        except FileNotFoundError as e:
+            raise CommandError(e)
+        self.stdout.write(
+            f"Imported {imported} users in {time.perf_counter() - start:.1f}s, "
+            f"{failed} rows failed"
+        )
+        if failed:
+            self.stdout.write(f"See {importer.errors_path} for errors")
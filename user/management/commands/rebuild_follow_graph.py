@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from user.graph import follow_graph, schedule_refresh
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the co-subscription graph snapshot from subscriptions, "
+        "running workers reload it on their own. Run it on deploy, background "
+        "workers then rebuild the snapshot periodically."
+    )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        graph = follow_graph.rebuild()
+        schedule_refresh()
+        self.stdout.write(
+            f"Built follow graph of {len(graph.followers.edges)} subscriptions "
+            f"to {len(graph.followers.nodes)} authors in "
+            f"{time.perf_counter() - start:.2f}s, saved to {follow_graph.path}"
+        )
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from user.models import InspirerProfile, User
+from user.profiles import rebuild_profile
+
+
+class Command(BaseCommand):
+    help = "Rebuilds public page documents of all inspirers."
+
+    def handle(self, *args, **options):
+        inspirers = User.objects.filter(groups__name="inspirer")
+        removed, _ = InspirerProfile.objects.exclude(user__in=inspirers).delete()
+        rebuilt = 0
+        for user_id in inspirers.values_list("id", flat=True).iterator():
+            rebuild_profile(user_id)
+            rebuilt += 1
+        self.stdout.write(f"Rebuilt {rebuilt} inspirer pages, removed {removed}")
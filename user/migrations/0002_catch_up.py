@@ -0,0 +1,242 @@
+# Generated by Django 4.0.6 on 2026-10-19 13:21
+
+from django.conf import settings
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import phonenumber_field.modelfields
+import random
+import string
+
+
+def fill_slugs(apps, schema_editor):
+    # existing users get unique random slugs like new ones do
+    User = apps.get_model("user", "User")
+    used = set()
+    for user in User.objects.filter(slug__isnull=True).only("id"):
+        slug = None
+        while slug is None or slug in used:
+            slug = "".join(random.choices(string.ascii_letters, k=20))
+        used.add(slug)
+        user.slug = slug
+        user.save(update_fields=["slug"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='achievement',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='communication',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='creativity',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='critical_thinking',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='idea_generation',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='individualist',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='introvert',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='leader',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='leadership',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='optimist',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='organisation',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='organized',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='resource_search',
+            field=models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(6)]),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='serious',
+            field=models.BooleanField(blank=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='slug',
+            field=models.SlugField(max_length=20, null=True),
+        ),
+        migrations.RunPython(fill_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='user',
+            name='slug',
+            field=models.SlugField(max_length=20, unique=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='telephone',
+            field=phonenumber_field.modelfields.PhoneNumberField(blank=True, max_length=128, region=None),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='want_to_find_out',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='want_to_get',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='want_to_learn',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_1',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_10',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_2',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_3',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_4',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_5',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_6',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_7',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_8',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='what_i_want_9',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='who_am_i_extra_1',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='who_am_i_extra_2',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='who_am_i_extra_3',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='who_am_i_extra_4',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='who_am_i_extra_5',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='first_name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='last_name',
+            field=models.CharField(max_length=255),
+        ),
+        migrations.CreateModel(
+            name='DreamAssociation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='uploads/')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dream_images', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Subscriber',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscribers', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subscriptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('author', 'user')},
+            },
+        ),
+    ]
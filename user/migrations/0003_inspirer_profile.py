@@ -0,0 +1,24 @@
+# Generated by Django 4.0.6 on 2026-10-19 13:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user', '0002_catch_up'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InspirerProfile',
+            fields=[
+                ('slug', models.SlugField(max_length=20, primary_key=True, serialize=False)),
+                ('document', models.JSONField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile_document', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -93,3 +93,17 @@ class Subscriber(models.Model):
 
     class Meta:
         unique_together = ("author", "user")
+
+
+class InspirerProfile(models.Model):
+    """Public page of an inspirer, rebuilt by user.profiles on changes"""
+
+    slug = models.SlugField(max_length=20, primary_key=True)
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="profile_document"
+    )
+    document = models.JSONField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.slug
@@ -0,0 +1,72 @@
+from django.db import transaction
+from rest_framework import serializers
+
+from common.queue import task
+from goals.models import Aim, Post
+from .models import InspirerProfile, User
+
+RECENT_POSTS = 10
+# fields of api.serializer.UserSerializer
+USER_FIELDS = ("id", "email", "first_name", "last_name", "slug")
+POST_FIELDS = ("id", "name", "video", "description", "created_at")
+
+_datetime_field = serializers.DateTimeField()
+
+
+def build_document(user):
+    """Public page of the user given as a dict of USER_FIELDS and subscriber_count"""
+    storage = Post._meta.get_field("video").storage
+    posts = list(
+        Post.objects.filter(creator_id=user["id"])
+        .order_by("-created_at")
+        .values(*POST_FIELDS)[:RECENT_POSTS]
+    )
+    for post in posts:
+        # made absolute when served
+        post["video"] = storage.url(post["video"]) if post["video"] else None
+        post["created_at"] = _datetime_field.to_representation(post["created_at"])
+
+    return {
+        **{field: user[field] for field in USER_FIELDS},
+        "subscriber_count": user["subscriber_count"],
+        "active_aims": Aim.objects.filter(user_id=user["id"]).count(),
+        "recent_posts": posts,
+    }
+
+
+@task(timeout=60)
+def rebuild_profile(user_id):
+    """
+    Stores the inspirer's page document and returns it, the document of a
+    user who isn't an inspirer anymore is removed.
+    """
+    user = (
+        User.objects.filter(id=user_id, groups__name="inspirer")
+        .values(*USER_FIELDS, "subscriber_count")
+        .first()
+    )
+    if user is None:
+        InspirerProfile.objects.filter(user_id=user_id).delete()
+        return None
+
+    document = build_document(user)
+    with transaction.atomic():
+        # slug changed
+        InspirerProfile.objects.filter(user_id=user_id).exclude(
+            slug=user["slug"]
+        ).delete()
+        InspirerProfile.objects.update_or_create(
+            slug=user["slug"], defaults={"user_id": user_id, "document": document}
+        )
+    return document
+
+
+def schedule_rebuild(user_id, force=False):
+    """
+    Queues rebuilding the user's document. Documents are built on first
+    request, so users without one are skipped unless forced.
+    """
+    if force or InspirerProfile.objects.filter(user_id=user_id).exists():
+        rebuild_profile.enqueue(
+            user_id=user_id, dedup_key=f"inspirer-profile:{user_id}"
+        )
@@ -1,8 +1,13 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 
 from common.generators import generate_charset
+from goals.models import Aim, Post
 from .models import User, Subscriber
+from .profiles import schedule_rebuild
+
+# user fields shown on the inspirer's page
+PROFILE_FIELDS = {"email", "first_name", "last_name", "slug", "subscriber_count"}
 
 
 @receiver(post_save, sender=User)
@@ -25,5 +30,36 @@ def create_user(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Subscriber)
 def delete_user(sender, instance, **kwargs):
     instance.author.subscriber_count -= 1
-    instance.author.save()
-    instance.delete()
+    instance.author.save(update_fields=["subscriber_count"])
+
+
+@receiver(post_save, sender=User)
+def refresh_profile(sender, instance, created, update_fields, **kwargs):
+    if created or (update_fields and not PROFILE_FIELDS & set(update_fields)):
+        return
+    schedule_rebuild(instance.id)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def refresh_profile_on_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        schedule_rebuild(instance.id, force=True)
+    else:
+        for user_id in pk_set or ():
+            schedule_rebuild(user_id, force=True)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def refresh_profile_on_post(sender, instance, **kwargs):
+    schedule_rebuild(instance.creator_id)
+
+
+@receiver(post_save, sender=Aim)
+@receiver(post_delete, sender=Aim)
+def refresh_profile_on_aim(sender, instance, created=True, **kwargs):
+    # only the number of aims is shown
+    if created:
+        schedule_rebuild(instance.user_id)
@@ -1,3 +1,139 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from common.models import Task
+from common.queue import claim, run
+from goals.models import Aim
+from user.graph import (
+    REFRESH_DEDUP_KEY,
+    REFRESH_INTERVAL,
+    FollowGraphStore,
+    schedule_refresh,
+)
+from user.models import InspirerProfile, Subscriber, User
+
+
+def make_user(email):
+    return User.objects.create(email=email, first_name="F", last_name="L")
+
+
+class FollowGraphStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "graph", "follow_graph.bin")
+        settings = override_settings(FOLLOW_GRAPH_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author, self.other, self.follower = (
+            make_user(f"user{i}@example.com") for i in range(3)
+        )
+        for author in (self.author, self.other):
+            Subscriber.objects.create(author=author, user=self.follower)
+        self.store = FollowGraphStore()
+
+    def run_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(run(claim()))
+
+    def test_missing_snapshot_is_built_by_workers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertLogs("user.graph", "WARNING"):
+                graph = self.store.get()
+        # the database isn't read during the request
+        self.assertEqual(graph.suggest(self.author.id, 10), [])
+        self.assertEqual(Task.objects.get().dedup_key, REFRESH_DEDUP_KEY)
+
+        self.run_refresh()
+        self.assertTrue(os.path.exists(self.path))
+        self.store._checked_at = 0
+        self.assertEqual(
+            self.store.get().suggest(self.author.id, 10), [(self.other.id, 1)]
+        )
+
+    def test_snapshot_is_refreshed_periodically(self):
+        self.store.rebuild()
+        followers = self.store.get().get_followers(self.author.id)
+        self.assertEqual(list(followers), [self.follower.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_refresh(delay=0)
+        newcomer = make_user("newcomer@example.com")
+        Subscriber.objects.create(author=self.author, user=newcomer)
+        os.utime(self.path, (0, 0))
+        self.run_refresh()
+
+        queued = Task.objects.get()
+        self.assertEqual(queued.dedup_key, REFRESH_DEDUP_KEY)
+        self.assertGreater(
+            (queued.run_at - queued.created_at).total_seconds(), REFRESH_INTERVAL - 5
+        )
+        self.store._checked_at = 0
+        self.assertEqual(
+            set(self.store.get().get_followers(self.author.id)),
+            {self.follower.id, newcomer.id},
+        )
+
+
+class InspirerProfileTests(APITestCase):
+    def setUp(self):
+        self.inspirer = make_user("inspirer@example.com")
+        self.group, _ = Group.objects.get_or_create(name="inspirer")
+        self.inspirer.groups.add(self.group)
+        self.url = f"/api/user/{self.inspirer.slug}/profile/"
+
+    def run_tasks(self):
+        while True:
+            claimed = claim()
+            if claimed is None:
+                return
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertTrue(run(claimed))
+
+    def test_profile_is_built_on_first_request(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["first_name"], "F")
+        self.assertEqual(response.data["active_aims"], 0)
+        self.assertEqual(response.data["recent_posts"], [])
+        self.assertTrue(InspirerProfile.objects.filter(user=self.inspirer).exists())
+
+    def test_profile_is_refreshed_after_changes(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inspirer.first_name = "New"
+            self.inspirer.save()
+            Aim.objects.create(
+                user=self.inspirer,
+                name="aim",
+                description="description",
+                deadline=timezone.now() + timedelta(days=30),
+            )
+        # served from the stored document until the workers rebuild it
+        self.assertEqual(self.client.get(self.url).data["first_name"], "F")
+
+        self.run_tasks()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["first_name"], "New")
+        self.assertEqual(response.data["active_aims"], 1)
+
+    def test_profile_of_other_users_is_not_found(self):
+        user = make_user("user@example.com")
+        response = self.client.get(f"/api/user/{user.slug}/profile/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(InspirerProfile.objects.exists())
+
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.inspirer.groups.remove(self.group)
+        self.run_tasks()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -9,7 +9,9 @@ https://docs.djangoproject.com/en/4.0/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
+import os
 from datetime import timedelta
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -33,6 +35,10 @@ ALLOWED_HOSTS = []
 if DEBUG:
     ALLOWED_HOSTS = ["*"]
 
+# defers optional subsystems (drf_yasg) until their routes are first hit,
+# see `manage.py profile_startup`
+LEAN_STARTUP = os.environ.get("LEAN_STARTUP") == "1"
+
 
 # Application definition
 
@@ -49,13 +55,16 @@ INSTALLED_APPS = [
     "corsheaders",
     "phonenumber_field",
     # app
+    "common",
     "api",
     "goals",
     "user",
 ]
 
 MIDDLEWARE = [
+    "common.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "common.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -68,15 +77,58 @@ MIDDLEWARE = [
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.renderers.FastJSONRenderer",
+        "api.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "rest_framework.parsers.JSONParser",
+        "api.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    # reverse proxies in front of the app, rate limits take the client IP
+    # from X-Forwarded-For only behind them and use REMOTE_ADDR otherwise
+    "NUM_PROXIES": int(os.environ.get("NUM_PROXIES", 0)),
 }
 
+# responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVEL = 6
+# seconds compressed bodies of cacheable responses are kept
+COMPRESSION_CACHE_TIMEOUT = 300
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(
         minutes=10000
     ),  # TODO change to hour in production
 }
 
+SCHEMA_SPEC_URL = ("schema-json", {"format": ".json"})
+
+SWAGGER_SETTINGS = {"SPEC_URL": SCHEMA_SPEC_URL}
+
+REDOC_SETTINGS = {"SPEC_URL": SCHEMA_SPEC_URL}
+
+# rendered OpenAPI schema, regenerated when the API or its source changes
+SCHEMA_CACHE_DIR = BASE_DIR / "schema_cache"
+
+# co-subscription graph snapshot, written by `manage.py rebuild_follow_graph`
+FOLLOW_GRAPH_PATH = BASE_DIR / "graph_cache" / "follow_graph.bin"
+
+# per process metric files summed by /metrics, emptied on deploy
+METRICS_DIR = BASE_DIR / "metrics"
+METRICS_FLUSH_INTERVAL = 5
+# if set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# token buckets of api.throttling shared by all workers
+RATE_LIMIT_PATH = BASE_DIR / "ratelimit" / "buckets.sqlite3"
+# seconds to wait for the store before letting the request through
+RATE_LIMIT_TIMEOUT = 0.1
+
 ROOT_URLCONF = "vdohnovitely_hack_backend.urls"
 
 WSGI_APPLICATION = "vdohnovitely_hack_backend.wsgi.application"
@@ -145,6 +197,22 @@ else:
     STATIC_ROOT = "/var/www/static/"
     MEDIA_ROOT = "/var/www/media/"
 
+DEFAULT_FILE_STORAGE = "common.storage.ContentAddressedStorage"
+# digest uploads for the storage while they are received
+FILE_UPLOAD_HANDLERS = [
+    "common.uploadhandlers.HashingMemoryFileUploadHandler",
+    "common.uploadhandlers.HashingTemporaryFileUploadHandler",
+]
+
+if LEAN_STARTUP:
+    # drf_yasg isn't imported as an app, its templates and static files are
+    # still served for the schema ui pages
+    DRF_YASG_DIR = Path(find_spec("drf_yasg").origin).parent
+    INSTALLED_APPS.remove("drf_yasg")
+    if DEBUG:
+        TEMPLATES[0]["DIRS"].append(DRF_YASG_DIR / "templates")
+        STATICFILES_DIRS.append(DRF_YASG_DIR / "static")
+
 AUTH_USER_MODEL = "user.User"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
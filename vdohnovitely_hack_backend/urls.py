@@ -2,41 +2,28 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include, re_path
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API",
-        default_version="v1",
-        description="description",
-        terms_of_service="https://akarpov.ru/about",
-        contact=openapi.Contact(email="alexander.d.karpov@gmail.com"),
-        license=openapi.License(name="BEBRA License"),
-    ),
-    validators=["ssv"],
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from api.schema import schema_document_view, schema_ui_view
+from common.metrics import metrics_view
 
 urlpatterns = (
     [
         path("admin/", admin.site.urls),
         path("api/", include("api.urls")),
+        path("metrics", metrics_view, name="metrics"),
         re_path(
             r"^swagger(?P<format>\.json|\.yaml)$",
-            schema_view.without_ui(cache_timeout=0),
+            schema_document_view,
             name="schema-json",
         ),
         re_path(
             r"^swagger/$",
-            schema_view.with_ui("swagger", cache_timeout=0),
+            schema_ui_view("swagger"),
             name="schema-swagger-ui",
         ),
         re_path(
             r"^redoc/$",
-            schema_view.with_ui("redoc", cache_timeout=0),
+            schema_ui_view("redoc"),
             name="schema-redoc",
         ),
     ]